@@ -1,7 +1,10 @@
-from scenarios.util import ExperimentBuilder, NodeCounts, WildfireDetSchedulingQualityExperiment
+from scenarios.util import ExperimentBuilder, NodeCounts, SweepConfig, TopologySource, WildfireDetSchedulingQualityExperiment, run_sweep
 
 RESULTS_CSV_PREFIX = 'results'
 
+TOPOLOGY_CACHE_DIR = '.topology-cache'
+'''The directory (relative to the scenarios directory) that contains the precomputed topologies, which are shared by all scenarios.'''
+
 NODE_COUNTS = [
     NodeCounts(satellites=1000, edge_nodes=100, ground_stations=10),
     NodeCounts(satellites=2000, edge_nodes=200, ground_stations=20),
@@ -13,7 +16,7 @@ def run_experiment(path_to_scenario_dir: str = '.'):
     exp_builder = ExperimentBuilder()
 
     for nodes_count in NODE_COUNTS:
-        experiment = WildfireDetSchedulingQualityExperiment(nodes_count, f'{path_to_scenario_dir}/../configs')
+        experiment = WildfireDetSchedulingQualityExperiment(nodes_count, f'{path_to_scenario_dir}/../configs', f'{path_to_scenario_dir}/../{TOPOLOGY_CACHE_DIR}')
 
         print('Executing experiment with HyperDrive')
         experiment.run_scheduling_quality_experiment(
@@ -40,6 +43,33 @@ def run_experiment(path_to_scenario_dir: str = '.'):
         )
 
 
+def run_experiment_sweep(
+    path_to_scenario_dir: str = '.',
+    seeds: list[int] | None = None,
+    max_workers: int | None = None,
+    topology_source: TopologySource = TopologySource.STARRYNET,
+    profiles: list[str] | None = None,
+):
+    '''
+    Runs all experiments of this scenario for each of the seeds in parallel on a process pool.
+    Each run writes its own results CSV file, whose name contains the seed. If no seeds are specified, only seed 1 is used.
+    `profiles`: the names of the SCHEDULER_PROFILES to run. If None, hyperdrive and all baselines are run.
+    '''
+    run_sweep(
+        SweepConfig(
+            path_to_config_dir=f'{path_to_scenario_dir}/../configs',
+            topology_cache_dir=f'{path_to_scenario_dir}/../{TOPOLOGY_CACHE_DIR}',
+            results_dir=f'{path_to_scenario_dir}/results',
+            node_counts=NODE_COUNTS,
+            profiles=profiles if profiles is not None else [ 'hyperdrive', 'firstfit', 'random', 'roundrobin' ],
+            seeds=seeds if seeds is not None else [ 1 ],
+            results_csv_prefix=RESULTS_CSV_PREFIX,
+            max_workers=max_workers,
+            topology_source=topology_source,
+        )
+    )
+
+
 if __name__ == '__main__':
     print('Please import and execute the run_experiment() function from the root directory of the project to ensure that the imports work correctly.')
     exit(1)
@@ -3,3 +3,4 @@ from .wildfire_det_scheduling_quality_experiment import *
 from .nodes_generator import *
 from .results_serializer import *
 from .workflow_helper import *
+from .sweep_runner import *
@@ -1,14 +1,33 @@
+import hashlib
 import math
+import os
 from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING
 from scheduler.model import AvailableNodes
-from scheduler.orchestrator import NodesManager
-from scheduler.orchestrator.starrynet import StarryNetClient, StarryNetTimeService
+from scheduler.orchestrator import GridShape, NodesCheckpoint, NodesManager, TopologyProvider, TopologyStore
+from scheduler.orchestrator.starrynet import RoutingBackend, SimulationEngine, StarryNetClient, StarryNetTimeService, StarryNetTopology, WalkerConstellationConfig, WalkerConstellationTopology
 from scheduler import create_default_candidate_nodes_plugin, create_default_commit_plugin, create_default_filter_plugins, create_default_score_plugins, Scheduler, SchedulerConfig, SchedulerPluginsConfig
-from scheduler.plugins import ResourcesFitPlugin, SelectNodesInVicinityPlugin
+from scheduler.plugins import HeatOptPlugin, NetworkQosPlugin, ResourcesFitPlugin, SelectNodesInVicinityPlugin, SloWindowMode
 from scheduler.plugins.baseline import FirstFitPlugin, RandomSelectionPlugin, RoundRobinPlugin, SelectAllNodesPlugin
-from starrynet.starrynet.sn_synchronizer import StarryNet
 from .nodes_generator import NodesGenerator
 
+if TYPE_CHECKING:
+    from starrynet.starrynet.sn_synchronizer import StarryNet
+
+
+class TopologySource(Enum):
+    '''The source of the network topology of an experiment.'''
+
+    STARRYNET = 'starrynet'
+    '''The topology is computed by the StarryNet submodule.'''
+
+    WALKER = 'walker'
+    '''
+    The topology is computed by the built-in WalkerConstellationTopology from the same StarryNet config file.
+    This does not require the StarryNet submodule and is much faster for large constellations.
+    '''
+
 
 @dataclass
 class NodeCounts:
@@ -23,8 +42,12 @@ class NodeCounts:
 
 @dataclass
 class StarryNetSetup:
-    sn: StarryNet
+    sn: 'StarryNet | None'
+    '''The StarryNet instance. This is None if the topology has been loaded from an existing TopologyStore or has not been computed by StarryNet.'''
+    topology: TopologyProvider
     satellites_count: int
+    grid_shape: GridShape
+    '''The shape of the +Grid constellation.'''
     total_nodes_count: int
     duration: int
     edge_node_locations_lat_long: list[tuple[float, float]]
@@ -33,10 +56,23 @@ class StarryNetSetup:
     '''All ground station locations, including the randomly generated ones.'''
 
 
+@dataclass
+class ExperimentNodes:
+    '''
+    The nodes for experiments with a specific StarryNet setup.
+    They can be reused by multiple experiments by restoring their initial state before each experiment.
+    '''
+    nodes: AvailableNodes
+    nodes_mgr: NodesManager
+    initial_state: NodesCheckpoint
+    '''The checkpoint of the state of all nodes after they have been generated.'''
+
+
 @dataclass
 class Experiment:
-    sn: StarryNet
+    sn: 'StarryNet | None'
     sn_time_svc: StarryNetTimeService
+    sim_engine: SimulationEngine
     sn_client: StarryNetClient
     nodes: AvailableNodes
     nodes_mgr: NodesManager
@@ -60,6 +96,8 @@ class ExperimentBuilder:
         gs_locations_lat_long: list[tuple[float, float]],
         edge_nodes_location_bounds: tuple[tuple[float, float], tuple[float, float]],
         gs_nodes_location_bounds: tuple[tuple[float, float], tuple[float, float]],
+        topology_cache_dir: str | None = None,
+        topology_source: TopologySource = TopologySource.STARRYNET,
     ) -> StarryNetSetup:
         '''
         Creates a StarryNet base setup, which can be used to initialize multiple experiments.
@@ -73,6 +111,10 @@ class ExperimentBuilder:
         `gs_locations_lat_long`: the locations of ground station nodes.  If `gs_nodes_count` is greater than the number of locations, the rest will be generated randomly.
         `edge_nodes_location_bounds`: the bounds of the region for randomly generated ground station node positions.
         `gs_nodes_location_bounds`: the bounds of the region for randomly generated ground station node positions.
+        `topology_cache_dir`: if set, the topologies of all time indices are precomputed once and stored in a memory-mapped TopologyStore in this directory.
+        Subsequent setups with the same configuration and node locations load the store instead of running StarryNet.
+        Note that the store keeps the link latencies as float32.
+        `topology_source`: the source of the topology (see `TopologySource`).
         '''
         # The configuration file has 72 Starlink orbital planes configured.
         # The total number of satellites is 72 * sats_per_orbit.
@@ -84,41 +126,94 @@ class ExperimentBuilder:
 
         edge_node_locations_lat_long = self.__extend_locations(nodes_gen, edge_node_locations_lat_long, node_counts.edge_nodes, edge_nodes_location_bounds)
         gs_locations_lat_long = self.__extend_locations(nodes_gen, gs_locations_lat_long, node_counts.ground_stations, gs_nodes_location_bounds);
-
-        sn = StarryNet(
-            configuration_file_path=config_path,
-            GS_lat_long=edge_node_locations_lat_long + gs_locations_lat_long,
-            hello_interval=1, # hello_interval(s) in OSPF. 1-200 are supported.
-            sats_per_orbit_override=int(math.ceil(node_counts.satellites / 72.0)),
-            duration_override=duration_minutes,
-        )
-
-        return StarryNetSetup(
-            sn=sn,
-            satellites_count=sn.constellation_size,
-            total_nodes_count=sn.constellation_size + len(edge_node_locations_lat_long) + len(gs_locations_lat_long),
-            duration=sn.duration,
-            edge_node_locations_lat_long=edge_node_locations_lat_long,
-            gs_locations_lat_long=gs_locations_lat_long,
-        )
-
-
-    def init_experiment(self, sn_setup: StarryNetSetup, scheduler_plugins: SchedulerPluginsConfig) -> Experiment:
+        sats_per_orbit = int(math.ceil(node_counts.satellites / 72.0))
+        terrestrial_nodes_count = len(edge_node_locations_lat_long) + len(gs_locations_lat_long)
+
+        store_path: str | None = None
+        if topology_cache_dir is not None:
+            with open(config_path, 'rb') as f:
+                config_hash = hashlib.sha256(f.read()).hexdigest()
+            store_key = TopologyStore.compute_key(
+                config=config_hash,
+                source=topology_source.value,
+                sats_per_orbit=sats_per_orbit,
+                duration=duration_minutes,
+                ground_locations=edge_node_locations_lat_long + gs_locations_lat_long,
+            )
+            store_path = os.path.join(topology_cache_dir, store_key)
+            if TopologyStore.exists(store_path):
+                store = TopologyStore(store_path)
+                return self.__create_sn_setup(None, store, store.satellites_count, sats_per_orbit, store.duration, edge_node_locations_lat_long, gs_locations_lat_long)
+
+        sn: 'StarryNet | None' = None
+        topology: TopologyProvider
+        if topology_source == TopologySource.WALKER:
+            walker_config = WalkerConstellationConfig.from_starrynet_config(config_path, sats_per_orbit)
+            topology = WalkerConstellationTopology(walker_config, edge_node_locations_lat_long + gs_locations_lat_long, duration_minutes)
+            satellites_count = walker_config.satellites_count
+            duration = duration_minutes
+        else:
+            # Imported here, so that the StarryNet submodule is only required if it is actually used.
+            from starrynet.starrynet.sn_synchronizer import StarryNet as StarryNetImpl
+            starrynet = StarryNetImpl(
+                configuration_file_path=config_path,
+                GS_lat_long=edge_node_locations_lat_long + gs_locations_lat_long,
+                hello_interval=1, # hello_interval(s) in OSPF. 1-200 are supported.
+                sats_per_orbit_override=sats_per_orbit,
+                duration_override=duration_minutes,
+            )
+            topology = StarryNetTopology(starrynet, starrynet.constellation_size + terrestrial_nodes_count)
+            satellites_count = starrynet.constellation_size
+            duration = starrynet.duration
+            sn = starrynet
+
+        if store_path is not None:
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            topology = TopologyStore.write(store_path, topology, satellites_count, duration)
+
+        return self.__create_sn_setup(sn, topology, satellites_count, sats_per_orbit, duration, edge_node_locations_lat_long, gs_locations_lat_long)
+
+
+    def init_nodes(self, sn_setup: StarryNetSetup) -> ExperimentNodes:
         '''
-        Initializes an experiment with the specified StarryNet setup and its data.
+        Generates the nodes for the specified StarryNet setup.
+        The returned ExperimentNodes can be passed to multiple calls of init_experiment() to avoid regenerating the nodes.
         '''
         # By reusing the same seed we ensure that the experiment is reproducible.
         nodes_gen = NodesGenerator(self.__random_seed)
-        sn_time_svc = StarryNetTimeService(sn_setup.duration)
 
         nodes = nodes_gen.generate_nodes(
             satellites_count=sn_setup.satellites_count,
             edge_node_locs_lat_long=sn_setup.edge_node_locations_lat_long,
             ground_station_locs_lat_long=sn_setup.gs_locations_lat_long,
         )
-
         nodes_mgr = NodesManager(nodes)
-        orch_client = StarryNetClient(nodes_mgr, sn_setup.sn, sn_time_svc)
+        return ExperimentNodes(nodes=nodes, nodes_mgr=nodes_mgr, initial_state=nodes_mgr.checkpoint())
+
+
+    def init_experiment(
+        self,
+        sn_setup: StarryNetSetup,
+        scheduler_plugins: SchedulerPluginsConfig,
+        exp_nodes: ExperimentNodes | None = None,
+        routing_backend: RoutingBackend = RoutingBackend.SPARSE,
+    ) -> Experiment:
+        '''
+        Initializes an experiment with the specified StarryNet setup and its data.
+        If `exp_nodes` are specified, they are reset to their initial state and reused, otherwise new nodes are generated.
+        `routing_backend` selects how the StarryNetClient computes latencies.
+        '''
+        if exp_nodes is not None:
+            exp_nodes.nodes_mgr.restore(exp_nodes.initial_state)
+        else:
+            exp_nodes = self.init_nodes(sn_setup)
+        nodes = exp_nodes.nodes
+        nodes_mgr = exp_nodes.nodes_mgr
+
+        sn_time_svc = StarryNetTimeService(sn_setup.duration)
+        sim_engine = SimulationEngine(sn_time_svc)
+        # The client schedules a TASK_COMPLETION event for each assigned task, which releases its resources.
+        orch_client = StarryNetClient(nodes_mgr, sn_setup.topology, sn_time_svc, routing_backend, sn_setup.grid_shape, sim_engine)
 
         scheduler = Scheduler(
             SchedulerConfig(
@@ -144,6 +239,7 @@ class ExperimentBuilder:
         return Experiment(
             sn=sn_setup.sn,
             sn_time_svc=sn_time_svc,
+            sim_engine=sim_engine,
             sn_client=orch_client,
             nodes=nodes,
             nodes_mgr=nodes_mgr,
@@ -161,6 +257,19 @@ class ExperimentBuilder:
         )
 
 
+    def create_predictive_hyperdrive_scheduler_plugins(self, window_mode: SloWindowMode = SloWindowMode.WORST_CASE) -> SchedulerPluginsConfig:
+        '''
+        Creates the hyperdrive plugins, but evaluates the network SLOs on the latencies predicted over the expected execution time of each task.
+        Both NetworkQosPlugin instances use the same window mode, so the filter and the score stage share the predicted latencies.
+        '''
+        return SchedulerPluginsConfig(
+            select_candidate_nodes_plugin=create_default_candidate_nodes_plugin(),
+            filter_plugins=[ ResourcesFitPlugin(), NetworkQosPlugin(window_mode) ],
+            score_plugins=[ NetworkQosPlugin(window_mode), HeatOptPlugin() ],
+            commit_plugin=create_default_commit_plugin(),
+        )
+
+
     def create_firstfit_scheduler_plugins(self) -> SchedulerPluginsConfig:
         return SchedulerPluginsConfig(
             select_candidate_nodes_plugin=SelectAllNodesPlugin(),
@@ -188,6 +297,28 @@ class ExperimentBuilder:
         )
 
 
+    def __create_sn_setup(
+        self,
+        sn: 'StarryNet | None',
+        topology: TopologyProvider,
+        satellites_count: int,
+        sats_per_orbit: int,
+        duration: int,
+        edge_node_locations_lat_long: list[tuple[float, float]],
+        gs_locations_lat_long: list[tuple[float, float]],
+    ) -> StarryNetSetup:
+        return StarryNetSetup(
+            sn=sn,
+            topology=topology,
+            satellites_count=satellites_count,
+            grid_shape=GridShape(orbits_count=satellites_count // sats_per_orbit, sats_per_orbit=sats_per_orbit),
+            total_nodes_count=satellites_count + len(edge_node_locations_lat_long) + len(gs_locations_lat_long),
+            duration=duration,
+            edge_node_locations_lat_long=edge_node_locations_lat_long,
+            gs_locations_lat_long=gs_locations_lat_long,
+        )
+
+
     def __extend_locations(self, nodes_gen: NodesGenerator, locs: list[tuple[float, float]], total: int, bounds: tuple[tuple[float, float], tuple[float, float]]) -> list[tuple[float, float]]:
         if len(locs) >= total:
             return locs
@@ -1,5 +1,5 @@
 from random import Random
-from scheduler.model import AvailableNodes, CpuArchitecture, EdgeNode, GroundStationNode, HeatInfo, Location, ResourceType, SatelliteNode
+from scheduler.model import AvailableNodes, CpuArchitecture, EdgeNode, GroundStationNode, HeatInfo, Location, NodeTable, ResourceType, SatelliteNode
 from scheduler.util import copy_dict
 
 class NodesGenerator:
@@ -14,9 +14,11 @@ class NodesGenerator:
             count: int,
             resources: list[dict[ResourceType, int]],
             heat_configs: list[HeatInfo],
+            table: NodeTable | None = None,
         ) -> list[SatelliteNode]:
         '''
         Generates `count` satellite nodes. The resources for each node are picked randomly from the resources list.
+        If `table` is specified, the nodes are stored in it.
         '''
 
         nodes: list[SatelliteNode] = []
@@ -26,6 +28,7 @@ class NodesGenerator:
                 self.__pick_and_copy_dict(resources),
                 CpuArchitecture.ARM64,
                 self.__pick_and_copy_heat_info(heat_configs),
+                table,
             )
             nodes.append(node)
         return nodes
@@ -36,9 +39,11 @@ class NodesGenerator:
             start_id: int,
             resources: list[dict[ResourceType, int]],
             locations_lat_long: list[tuple[float, float]],
+            table: NodeTable | None = None,
         ) -> list[EdgeNode]:
         '''
         Generates `len(locations)` edge nodes. The resources for each node are picked randomly from the resources list.
+        If `table` is specified, the nodes are stored in it.
         '''
 
         nodes: list[EdgeNode] = []
@@ -50,6 +55,7 @@ class NodesGenerator:
                 self.__pick_and_copy_dict(resources),
                 CpuArchitecture.ARM64,
                 Location(lat=loc[0], long=loc[1], altitude_km=0.0),
+                table,
             )
             nodes.append(node)
             id += 1
@@ -61,9 +67,11 @@ class NodesGenerator:
             start_id: int,
             resources: list[dict[ResourceType, int]],
             locations_lat_long: list[tuple[float, float]],
+            table: NodeTable | None = None,
         ) -> list[GroundStationNode]:
         '''
         Generates `len(locations)` ground station nodes. The resources for each node are picked randomly from the resources list.
+        If `table` is specified, the nodes are stored in it.
         '''
 
         nodes: list[GroundStationNode] = []
@@ -75,6 +83,7 @@ class NodesGenerator:
                 self.__pick_and_copy_dict(resources),
                 CpuArchitecture.INTEL64,
                 Location(lat=loc[0], long=loc[1], altitude_km=0.0),
+                table,
             )
             nodes.append(node)
             id += 1
@@ -87,6 +96,8 @@ class NodesGenerator:
             edge_node_locs_lat_long: list[tuple[float, float]],
             ground_station_locs_lat_long: list[tuple[float, float]],
         ) -> AvailableNodes:
+        '''Generates all nodes and stores them in a shared NodeTable, such that the node IDs match the node names.'''
+        table = NodeTable(satellites_count + len(edge_node_locs_lat_long) + len(ground_station_locs_lat_long))
         return AvailableNodes(
             satellites=self.generate_satellites(
                 0,
@@ -123,7 +134,8 @@ class NodesGenerator:
                         temp_inc_per_cpu_minute_C=0.5,
                         mocked_max_orbit_base_temp_C=45.0,
                     ),
-                ]
+                ],
+                table,
             ),
             edge_nodes=self.generate_edge_nodes(
                 satellites_count,
@@ -138,6 +150,7 @@ class NodesGenerator:
                     }
                 ],
                 edge_node_locs_lat_long,
+                table,
             ),
             cloud_nodes=[],
             ground_stations=self.generate_ground_stations(
@@ -149,6 +162,7 @@ class NodesGenerator:
                     }
                 ],
                 ground_station_locs_lat_long,
+                table,
             )
         )
 
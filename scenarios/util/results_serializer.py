@@ -4,8 +4,8 @@ from scheduler.scheduler import SchedulingResult
 
 def write_results_to_csv(path: str, results: list[SchedulingResult]):
     dir = os.path.dirname(os.path.abspath(path))
-    if not os.path.isdir(dir):
-        os.makedirs(dir)
+    # exist_ok avoids a race condition if multiple processes write results into the same new directory.
+    os.makedirs(dir, exist_ok=True)
 
     keys = list(results[0].to_dict().keys())
     with open(path, 'w') as csv_file:
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable
+from scheduler import SchedulerPluginsConfig
+from .experiment_builder import ExperimentBuilder, NodeCounts, TopologySource
+from .wildfire_det_scheduling_quality_experiment import WildfireDetSchedulingQualityExperiment
+
+SCHEDULER_PROFILES: dict[str, Callable[[ExperimentBuilder, int], SchedulerPluginsConfig]] = {
+    'hyperdrive': lambda exp_builder, total_nodes: exp_builder.create_hyperdrive_scheduler_plugins(),
+    'hyperdrive-predictive': lambda exp_builder, total_nodes: exp_builder.create_predictive_hyperdrive_scheduler_plugins(),
+    'firstfit': lambda exp_builder, total_nodes: exp_builder.create_firstfit_scheduler_plugins(),
+    'random': lambda exp_builder, total_nodes: exp_builder.create_random_scheduler_plugins(),
+    'roundrobin': lambda exp_builder, total_nodes: exp_builder.create_roundrobin_scheduler_plugins(total_nodes),
+}
+'''
+The scheduler profiles that can be used in a sweep.
+Each entry creates the scheduler plugins for the profile from an ExperimentBuilder and the total number of nodes.
+'''
+
+
+@dataclass
+class SweepConfig:
+    '''Configures a sweep of wildfire detection scheduling quality experiments.'''
+
+    path_to_config_dir: str
+    '''The directory that contains the StarryNet config files.'''
+
+    topology_cache_dir: str
+    '''
+    The directory for the precomputed topologies.
+    Each topology is computed once and then memory-mapped by all worker processes that need it.
+    '''
+
+    results_dir: str
+    '''The directory, into which the results CSV files are written.'''
+
+    node_counts: list[NodeCounts]
+    profiles: list[str]
+    '''The names of the scheduler profiles to run (see `SCHEDULER_PROFILES`).'''
+
+    seeds: list[int]
+    '''The random seeds for generating the nodes.'''
+
+    results_csv_prefix: str = 'results'
+
+    max_workers: int | None = None
+    '''The maximum number of worker processes. If None, the number of CPUs is used.'''
+
+    topology_source: TopologySource = TopologySource.STARRYNET
+    '''Determines whether the topologies are computed by StarryNet or by the built-in Walker constellation model.'''
+
+
+@dataclass
+class SweepRun:
+    '''A single run of a sweep.'''
+    node_counts: NodeCounts
+    profile: str
+    seed: int
+
+
+def run_sweep(config: SweepConfig) -> list[str]:
+    '''
+    Runs all combinations of node counts, profiles, and seeds of the sweep on a process pool and returns the paths of the results CSV files.
+
+    The sweep runs in two phases:
+    1. The topologies for all combinations of node counts and seeds are precomputed in parallel and stored in the topology cache.
+    2. All runs are executed in parallel. Each worker loads the precomputed topology using mmap, so the topology data is
+       shared through the OS page cache instead of being pickled into every worker, and writes its own results CSV file.
+    '''
+    for profile in config.profiles:
+        if profile not in SCHEDULER_PROFILES:
+            raise ValueError(f'Unknown scheduler profile: {profile}')
+
+    topologies = [ (node_counts, seed) for node_counts in config.node_counts for seed in config.seeds ]
+    runs = [ SweepRun(node_counts, profile, seed) for node_counts, seed in topologies for profile in config.profiles ]
+    results_csvs: list[str] = []
+
+    with ProcessPoolExecutor(max_workers=config.max_workers) as executor:
+        prepare_futures = [ executor.submit(_prepare_topology, config, node_counts, seed) for node_counts, seed in topologies ]
+        for future in as_completed(prepare_futures):
+            future.result()
+        print(f'Precomputed {len(topologies)} topologies.')
+
+        run_futures = { executor.submit(_execute_run, config, run): run for run in runs }
+        for future in as_completed(run_futures):
+            run = run_futures[future]
+            results_csvs.append(future.result())
+            print(f'Finished run {len(results_csvs)}/{len(runs)}: {run}')
+
+    return results_csvs
+
+
+def _prepare_topology(config: SweepConfig, node_counts: NodeCounts, seed: int):
+    _create_experiment(config, node_counts, seed)
+
+
+def _execute_run(config: SweepConfig, run: SweepRun) -> str:
+    experiment = _create_experiment(config, run.node_counts, run.seed)
+    plugins = SCHEDULER_PROFILES[run.profile](ExperimentBuilder(run.seed), experiment.total_nodes)
+    results_csv = os.path.join(config.results_dir, f'{config.results_csv_prefix}-{experiment.total_nodes}-{run.profile}-seed{run.seed}.csv')
+    experiment.run_scheduling_quality_experiment(plugins, results_csv)
+    return results_csv
+
+
+def _create_experiment(config: SweepConfig, node_counts: NodeCounts, seed: int) -> WildfireDetSchedulingQualityExperiment:
+    return WildfireDetSchedulingQualityExperiment(node_counts, config.path_to_config_dir, config.topology_cache_dir, seed, config.topology_source)
@@ -2,21 +2,31 @@ import math
 from typing import cast
 from scheduler.model import ResourceType, SatelliteNode
 from scheduler import SchedulingResult, SchedulerPluginsConfig
+from scheduler.orchestrator.starrynet import EventKind, RoutingBackend, SimulationAction
 from scheduler.pipeline import SchedulingContext
 from scheduler.plugins import SelectNodesInVicinityPlugin
 from .workflow_helper import create_wildfire_detection_wf, WildfireDetectionWorkflow
 from .results_serializer import write_results_to_csv
-from .experiment_builder import Experiment, ExperimentBuilder, NodeCounts, StarryNetSetup
+from .experiment_builder import Experiment, ExperimentBuilder, ExperimentNodes, NodeCounts, StarryNetSetup, TopologySource
 
 class WildfireDetSchedulingQualityExperiment:
 
-    def __init__(self, node_counts: NodeCounts, path_to_config_dir: str):
-        self.__exp_builder = ExperimentBuilder()
-        self.__sn_setup = self.__init_sn(node_counts, path_to_config_dir)
+    def __init__(
+        self,
+        node_counts: NodeCounts,
+        path_to_config_dir: str,
+        topology_cache_dir: str | None = None,
+        random_seed: int = 1,
+        topology_source: TopologySource = TopologySource.STARRYNET,
+    ):
+        self.__exp_builder = ExperimentBuilder(random_seed)
+        self.__sn_setup = self.__init_sn(node_counts, path_to_config_dir, topology_cache_dir, topology_source)
         self.total_nodes = self.__sn_setup.total_nodes_count
+        self.__exp_nodes: ExperimentNodes | None = None
+        '''The nodes are generated once and reset to their initial state for every run.'''
 
 
-    def __init_sn(self, node_counts: NodeCounts, path_to_config_dir: str) -> StarryNetSetup:
+    def __init_sn(self, node_counts: NodeCounts, path_to_config_dir: str, topology_cache_dir: str | None, topology_source: TopologySource) -> StarryNetSetup:
         print(f'Setting up StarryNet with {node_counts}.')
         config_file_path = f'{path_to_config_dir}/config-72orbits.json'
 
@@ -46,16 +56,21 @@ class WildfireDetSchedulingQualityExperiment:
             edge_node_locations_lat_long=edge_lat_long,
             edge_nodes_location_bounds=((41.990495, -124.218537), (32.729169, -114.613391)),
             gs_nodes_location_bounds=((90.0, 180.0), (-90.0, -180.0)),
+            topology_cache_dir=topology_cache_dir,
+            topology_source=topology_source,
         )
 
 
-    def run_scheduling_quality_experiment(self, scheduler_plugins: SchedulerPluginsConfig, results_csv: str):
+    def run_scheduling_quality_experiment(self, scheduler_plugins: SchedulerPluginsConfig, results_csv: str, routing_backend: RoutingBackend = RoutingBackend.SPARSE):
+        if self.__exp_nodes is None:
+            self.__exp_nodes = self.__exp_builder.init_nodes(self.__sn_setup)
         experiment = self.__exp_builder.init_experiment(
             sn_setup=self.__sn_setup,
             scheduler_plugins=scheduler_plugins,
+            exp_nodes=self.__exp_nodes,
+            routing_backend=routing_backend,
         )
         scheduler = experiment.scheduler
-        sn_time_svc = experiment.sn_time_svc
 
         # StarryNet doesn't support multiple constellations (I think), so we pick one of our StarLink satellites as our EO satellite.
         # For now we just pick a temporary one. This will be updated during the experiment.
@@ -72,11 +87,6 @@ class WildfireDetSchedulingQualityExperiment:
         scheduling_results: list[SchedulingResult] = []
 
         def schedule_next_task_fn(curr_wildfire_wf: WildfireDetectionWorkflow):
-            # Ensure that the network graph is up to date.
-            # Since the graph would normally be updated in the background, we don't want the reading of the delay file and the graph update
-            # as a bias in the scheduling time.
-            experiment.sn_client.get_network_graph()
-
             task = curr_wildfire_wf.get_next_task()
             result = scheduler.schedule(task, curr_wildfire_wf.wf)
             scheduling_results.append(result)
@@ -90,27 +100,35 @@ class WildfireDetSchedulingQualityExperiment:
             eo_sat_node = self.__find_eo_satellite(curr_wildfire_wf, experiment, experiment.select_vicinity)
             curr_wildfire_wf.object_det_task.data_source_slos[0].data_source = eo_sat_node
 
-        sn_time_svc.run_simulation({
-            2: lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[0]),
-            4: lambda curr_time: schedule_next_task_fn(wildfire_workflows[0]),
-            8: lambda curr_time: schedule_next_task_fn(wildfire_workflows[0]),
+        def add_scheduling_event(time: int, action: SimulationAction):
+            # Ensure that the network topology is up to date before scheduling.
+            # Since the topology would normally be updated in the background, we don't want the reading of the delay file and the topology update
+            # as a bias in the scheduling time.
+            sim_engine.schedule(time, EventKind.TOPOLOGY_UPDATE, lambda curr_time: experiment.sn_client.update_topology())
+            sim_engine.schedule(time, EventKind.SCHEDULING, action)
+
+        sim_engine = experiment.sim_engine
+        add_scheduling_event(2, lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[0]))
+        add_scheduling_event(4, lambda curr_time: schedule_next_task_fn(wildfire_workflows[0]))
+        add_scheduling_event(8, lambda curr_time: schedule_next_task_fn(wildfire_workflows[0]))
+
+        add_scheduling_event(10, lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[1]))
+        add_scheduling_event(12, lambda curr_time: schedule_next_task_fn(wildfire_workflows[1]))
+        add_scheduling_event(16, lambda curr_time: schedule_next_task_fn(wildfire_workflows[1]))
 
-            10: lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[1]),
-            12: lambda curr_time: schedule_next_task_fn(wildfire_workflows[1]),
-            16: lambda curr_time: schedule_next_task_fn(wildfire_workflows[1]),
+        add_scheduling_event(18, lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[2]))
+        add_scheduling_event(20, lambda curr_time: schedule_next_task_fn(wildfire_workflows[2]))
+        add_scheduling_event(24, lambda curr_time: schedule_next_task_fn(wildfire_workflows[2]))
 
-            18: lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[2]),
-            20: lambda curr_time: schedule_next_task_fn(wildfire_workflows[2]),
-            24: lambda curr_time: schedule_next_task_fn(wildfire_workflows[2]),
+        add_scheduling_event(26, lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[3]))
+        add_scheduling_event(28, lambda curr_time: schedule_next_task_fn(wildfire_workflows[3]))
+        add_scheduling_event(32, lambda curr_time: schedule_next_task_fn(wildfire_workflows[3]))
 
-            26: lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[3]),
-            28: lambda curr_time: schedule_next_task_fn(wildfire_workflows[3]),
-            32: lambda curr_time: schedule_next_task_fn(wildfire_workflows[3]),
+        add_scheduling_event(34, lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[4]))
+        add_scheduling_event(36, lambda curr_time: schedule_next_task_fn(wildfire_workflows[4]))
+        add_scheduling_event(40, lambda curr_time: schedule_next_task_fn(wildfire_workflows[4]))
 
-            34: lambda curr_time: schedule_and_adjust_eo_sat(wildfire_workflows[4]),
-            36: lambda curr_time: schedule_next_task_fn(wildfire_workflows[4]),
-            40: lambda curr_time: schedule_next_task_fn(wildfire_workflows[4]),
-        })
+        sim_engine.run()
 
         print(scheduling_results)
         write_results_to_csv(results_csv, scheduling_results)
@@ -134,7 +152,9 @@ class WildfireDetSchedulingQualityExperiment:
         satellite = cast(SatelliteNode, satellites[keys_list[-1]])
 
         # Claim all the resources to avoid having something scheduled on it.
-        satellite.resources[ResourceType.MILLI_CPU] = 0
-        satellite.resources[ResourceType.MEMORY_MIB] = 0
+        # The capacity is removed as well, so that tasks that finish on this satellite do not release their resources to it.
+        for res_type in (ResourceType.MILLI_CPU, ResourceType.MEMORY_MIB):
+            satellite.resources[res_type] = 0
+            satellite.capacity[res_type] = 0
         return satellite
 
@@ -1,4 +1,6 @@
 from .node import *
+from .node_table import *
+from .ranked_nodes import *
 from .resources import *
 from .slos import *
 from .task import *
@@ -1,6 +1,8 @@
+from collections.abc import Iterator, MutableMapping
 from dataclasses import dataclass
 from typing import Optional
 import uuid
+from .node_table import CPU_ARCHITECTURES, RESOURCE_INDEX, RESOURCE_TYPES, NodeKind, NodeTable
 from .resources import CpuArchitecture, ResourceType
 
 @dataclass
@@ -51,27 +53,65 @@ class HeatInfo:
 class Node:
     '''
     Describes a general purpose compute node.
+
+    The state of a node is stored in a row of a NodeTable, the Node object is a thin view over this row.
+    If no table is specified, the node gets its own table, from which it is moved when it
+    is added to a shared table (see `NodeTable.for_nodes()`).
     '''
 
-    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture):
+    __slots__ = ('name', '__table', '__node_id')
+
+    _kind = NodeKind.GENERIC
+    '''The kind of node stored in the NodeTable.'''
+
+    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture, table: NodeTable | None = None):
         if name is None:
             name = str(uuid.uuid4())
         self.name = name
         if cpu_arch is None:
             raise ValueError('cpu_arch must not be None')
-        self.cpu_arch = cpu_arch
+
+        if table is None:
+            table = NodeTable(initial_capacity=1)
+        self.__table = table
+        self.__node_id = table.add_row(self, self._kind, cpu_arch)
 
         if resources is None:
             resources = {}
-        self.resources = resources
+        for res_type, qty in resources.items():
+            table.set_resource(self.__node_id, res_type, free_qty=qty, total_qty=qty)
+
+    @property
+    def table(self) -> NodeTable:
+        '''The NodeTable that stores the state of this node.'''
+        return self.__table
+
+    @property
+    def node_id(self) -> int:
+        '''The ID of this node, i.e., its row index in the NodeTable.'''
+        return self.__node_id
+
+    @property
+    def cpu_arch(self) -> CpuArchitecture:
+        return CPU_ARCHITECTURES[self.__table.cpu_arch[self.__node_id]]
+
+    @cpu_arch.setter
+    def cpu_arch(self, cpu_arch: CpuArchitecture):
+        self.__table.set_cpu_arch(self.__node_id, cpu_arch)
+
+    @property
+    def resources(self) -> 'ResourcesView':
         '''
         All available resources of this node.
 
         See the ResourceType enum for a list of available resource types.
         '''
+        return ResourcesView(self, total=False)
 
-        self.capacity = resources.copy()
+    @property
+    def capacity(self) -> 'ResourcesView':
         '''The total resource capacity of the node (free + used).'''
+        return ResourcesView(self, total=True)
 
     @property
     def milli_cpu(self) -> int:
@@ -89,6 +129,52 @@ class Node:
     def set_memory_mib(self, memory_mib: int):
         self.resources[ResourceType.MEMORY_MIB] = memory_mib
 
+    def _move_to(self, table: NodeTable):
+        '''Moves the state of this node into a new row of the specified table.'''
+        node_id = table.add_row(self, self._kind, self.cpu_arch)
+        table.copy_row_from(self.__table, self.__node_id, node_id)
+        self.__table = table
+        self.__node_id = node_id
+
+
+class ResourcesView(MutableMapping[ResourceType, int]):
+    '''Dictionary view of the free or the total resources of a node, which reads and writes the node's row in its NodeTable.'''
+
+    __slots__ = ('__node', '__total')
+
+    def __init__(self, node: Node, total: bool):
+        self.__node = node
+        self.__total = total
+
+    def __getitem__(self, key: ResourceType) -> int:
+        table = self.__node.table
+        node_id = self.__node.node_id
+        res_index = RESOURCE_INDEX[key]
+        if not table.has_resource[node_id, res_index]:
+            raise KeyError(key)
+        values = table.total if self.__total else table.free
+        return int(values[node_id, res_index])
+
+    def __setitem__(self, key: ResourceType, value: int):
+        if self.__total:
+            self.__node.table.set_resource(self.__node.node_id, key, total_qty=value)
+        else:
+            self.__node.table.set_resource(self.__node.node_id, key, free_qty=value)
+
+    def __delitem__(self, key: ResourceType):
+        if key not in self:
+            raise KeyError(key)
+        self.__node.table.remove_resource(self.__node.node_id, key)
+
+    def __iter__(self) -> Iterator[ResourceType]:
+        has_resource = self.__node.table.has_resource[self.__node.node_id]
+        return (res_type for res_type, has in zip(RESOURCE_TYPES, has_resource) if has)
+
+    def __len__(self) -> int:
+        return int(self.__node.table.has_resource[self.__node.node_id].sum())
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 
 class TerrestrialNode(Node):
@@ -96,29 +182,114 @@ class TerrestrialNode(Node):
     A Node located on Earth.
     '''
 
-    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture, loc: Location):
-        super().__init__(name=name, resources=resources, cpu_arch=cpu_arch)
+    __slots__ = ()
+
+    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture, loc: Location, table: NodeTable | None = None):
+        super().__init__(name=name, resources=resources, cpu_arch=cpu_arch, table=table)
         self.location = loc
 
+    @property
+    def location(self) -> Location:
+        table = self.table
+        node_id = self.node_id
+        return Location(lat=float(table.lat[node_id]), long=float(table.long[node_id]), altitude_km=float(table.altitude_km[node_id]))
+
+    @location.setter
+    def location(self, loc: Location):
+        self.table.set_location(self.node_id, loc.lat, loc.long, loc.altitude_km)
+
 
 class CloudNode(TerrestrialNode):
-    pass
+    __slots__ = ()
+    _kind = NodeKind.CLOUD
 
 
 class GroundStationNode(TerrestrialNode):
-    pass
+    __slots__ = ()
+    _kind = NodeKind.GROUND_STATION
 
 
 class EdgeNode(TerrestrialNode):
-    pass
+    __slots__ = ()
+    _kind = NodeKind.EDGE
 
 
 class SatelliteNode(Node):
 
-    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture, heat_status: HeatInfo):
-        super().__init__(name=name, resources=resources, cpu_arch=cpu_arch)
+    __slots__ = ()
+    _kind = NodeKind.SATELLITE
+
+    def __init__(self, name: str, resources: dict[ResourceType, int], cpu_arch: CpuArchitecture, heat_status: HeatInfo, table: NodeTable | None = None):
+        super().__init__(name=name, resources=resources, cpu_arch=cpu_arch, table=table)
         self.heat_status = heat_status
 
+    @property
+    def heat_status(self) -> 'HeatInfoView':
+        return HeatInfoView(self)
+
+    @heat_status.setter
+    def heat_status(self, heat_status: HeatInfo):
+        self.table.set_heat_info(
+            self.node_id,
+            temperature_C=heat_status.temperature_C,
+            max_temp_C=heat_status.max_temp_C,
+            recommended_high_temp_C=heat_status.recommended_high_temp_C,
+            temp_inc_per_cpu_minute_C=heat_status.temp_inc_per_cpu_minute_C,
+            radiated_heat_per_minute_C=heat_status.radiated_heat_per_minute_C,
+            mocked_max_orbit_base_temp_C=heat_status.mocked_max_orbit_base_temp_C,
+        )
+
+
+class HeatInfoView:
+    '''
+    View of the heat status of a satellite, which reads and writes the node's row in its NodeTable.
+    It provides the same attributes as HeatInfo.
+    '''
+
+    __slots__ = ('__node',)
+
+    def __init__(self, node: SatelliteNode):
+        self.__node = node
+
+    @property
+    def temperature_C(self) -> float:
+        return float(self.__node.table.temperature_C[self.__node.node_id])
+
+    @temperature_C.setter
+    def temperature_C(self, value: float):
+        self.__node.table.set_temperature(self.__node.node_id, value)
+
+    @property
+    def max_temp_C(self) -> float:
+        return float(self.__node.table.max_temp_C[self.__node.node_id])
+
+    @property
+    def recommended_high_temp_C(self) -> float:
+        return float(self.__node.table.recommended_high_temp_C[self.__node.node_id])
+
+    @property
+    def temp_inc_per_cpu_minute_C(self) -> float:
+        return float(self.__node.table.temp_inc_per_cpu_minute_C[self.__node.node_id])
+
+    @property
+    def radiated_heat_per_minute_C(self) -> float:
+        return float(self.__node.table.radiated_heat_per_minute_C[self.__node.node_id])
+
+    @property
+    def mocked_max_orbit_base_temp_C(self) -> float:
+        return float(self.__node.table.mocked_max_orbit_base_temp_C[self.__node.node_id])
+
+    def to_heat_info(self) -> HeatInfo:
+        '''Returns a copy of the heat status as a HeatInfo object.'''
+        return HeatInfo(
+            temperature_C=self.temperature_C,
+            max_temp_C=self.max_temp_C,
+            recommended_high_temp_C=self.recommended_high_temp_C,
+            temp_inc_per_cpu_minute_C=self.temp_inc_per_cpu_minute_C,
+            radiated_heat_per_minute_C=self.radiated_heat_per_minute_C,
+            mocked_max_orbit_base_temp_C=self.mocked_max_orbit_base_temp_C,
+        )
+
 
 @dataclass
 class AvailableNodes:
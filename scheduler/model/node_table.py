@@ -0,0 +1,459 @@
+from enum import Enum
+from typing import TYPE_CHECKING, Iterable, Sequence
+import numpy as np
+from .resources import CpuArchitecture, ResourceType
+
+if TYPE_CHECKING:
+    from .node import Node
+
+
+class NodeKind(Enum):
+    '''The type of a node, as stored in the `kind` column of a NodeTable.'''
+    GENERIC = 0
+    CLOUD = 1
+    GROUND_STATION = 2
+    EDGE = 3
+    SATELLITE = 4
+
+
+RESOURCE_TYPES = list(ResourceType)
+'''The order of the resource columns in a NodeTable.'''
+
+RESOURCE_INDEX: dict[ResourceType, int] = { res_type: i for i, res_type in enumerate(RESOURCE_TYPES) }
+'''Maps each ResourceType to its column index in the resource arrays of a NodeTable.'''
+
+CPU_ARCHITECTURES = list(CpuArchitecture)
+'''The order of the CPU architecture codes in a NodeTable.'''
+
+CPU_ARCH_CODES: dict[CpuArchitecture, int] = { arch: i for i, arch in enumerate(CPU_ARCHITECTURES) }
+'''Maps each CpuArchitecture to its code in the `cpu_arch` column of a NodeTable.'''
+
+
+_RowState = tuple[np.ndarray, np.ndarray, np.ndarray, int, int, list[float]]
+'''The saved values of a single row of a NodeTable: free, total, has_resource, cpu_arch, kind, and the float columns.'''
+
+
+class NodeTableCheckpoint:
+    '''A checkpoint of the state of a NodeTable, which is created by `NodeTable.checkpoint()`.'''
+
+    def __init__(self, table: 'NodeTable', level: int, size: int):
+        self.table = table
+        '''The table, to which this checkpoint belongs.'''
+
+        self.level = level
+        '''The nesting level of this checkpoint. Checkpoints created while this one is active have higher levels.'''
+
+        self.size = size
+        '''The number of rows in the table when the checkpoint was created.'''
+
+
+class NodeTable:
+    '''
+    Columnar (struct-of-arrays) storage for the state of many nodes.
+
+    Each node occupies one row of the table. The row index is the integer node ID.
+    Node objects are thin views over their row, so the state can be read and updated both through
+    the Node objects and in a vectorized fashion through the columns of this table.
+
+    The column properties return views of the underlying arrays, which are only valid until the next row is added.
+    All modifications must be made through the methods of this class.
+
+    Every write to a row assigns a new, table-wide unique version to the row (see `row_versions`),
+    which allows caches of per-node results to detect which rows have changed since the results were computed.
+
+    Checkpoints allow reverting the table to an earlier state. They are implemented as a copy-on-write undo log:
+    the first write to a row after a checkpoint saves the old values of that row, so creating a checkpoint is O(1)
+    and restoring it is O(changed rows). Checkpoints can be nested to evaluate multiple branches from the same starting state,
+    e.g., one branch per scheduler profile, by restoring the checkpoint after each branch.
+    '''
+
+    def __init__(self, initial_capacity: int = 16):
+        self.__size = 0
+        self.__capacity = 0
+        self.__nodes: list['Node'] = []
+
+        res_count = len(RESOURCE_TYPES)
+        self.__free = np.zeros((0, res_count), dtype=np.int64)
+        self.__total = np.zeros((0, res_count), dtype=np.int64)
+        self.__has_resource = np.zeros((0, res_count), dtype=np.bool_)
+        self.__cpu_arch = np.zeros(0, dtype=np.int8)
+        self.__kind = np.zeros(0, dtype=np.int8)
+        self.__lat = np.zeros(0, dtype=np.float64)
+        self.__long = np.zeros(0, dtype=np.float64)
+        self.__altitude_km = np.zeros(0, dtype=np.float64)
+        self.__temperature_C = np.zeros(0, dtype=np.float64)
+        self.__max_temp_C = np.zeros(0, dtype=np.float64)
+        self.__recommended_high_temp_C = np.zeros(0, dtype=np.float64)
+        self.__temp_inc_per_cpu_minute_C = np.zeros(0, dtype=np.float64)
+        self.__radiated_heat_per_minute_C = np.zeros(0, dtype=np.float64)
+        self.__mocked_max_orbit_base_temp_C = np.zeros(0, dtype=np.float64)
+        self.__row_versions = np.zeros(0, dtype=np.int64)
+        self.__version = 0
+        '''The most recently assigned row version.'''
+
+        self.__checkpoints: list[tuple[NodeTableCheckpoint, dict[int, _RowState]]] = []
+        '''The active checkpoints, each with the saved rows that have been modified since the checkpoint was created.'''
+
+        self.__grow(max(initial_capacity, 1))
+
+
+    def __len__(self) -> int:
+        return self.__size
+
+
+    @property
+    def nodes(self) -> Sequence['Node']:
+        '''The Node objects stored in this table, indexed by node ID.'''
+        return self.__nodes
+
+    @property
+    def free(self) -> np.ndarray:
+        '''The free quantity of each resource. The shape is (nodes, resource types), the column order is given by `RESOURCE_INDEX`.'''
+        return self.__free[:self.__size]
+
+    @property
+    def total(self) -> np.ndarray:
+        '''The total capacity (free + used) of each resource. The shape is (nodes, resource types).'''
+        return self.__total[:self.__size]
+
+    @property
+    def has_resource(self) -> np.ndarray:
+        '''True if a node provides the respective resource type at all. The shape is (nodes, resource types).'''
+        return self.__has_resource[:self.__size]
+
+    @property
+    def cpu_arch(self) -> np.ndarray:
+        '''The CPU architecture code of each node (see `CPU_ARCH_CODES`).'''
+        return self.__cpu_arch[:self.__size]
+
+    @property
+    def kind(self) -> np.ndarray:
+        '''The NodeKind value of each node.'''
+        return self.__kind[:self.__size]
+
+    @property
+    def lat(self) -> np.ndarray:
+        '''The latitude of each terrestrial node. This is NaN for satellites.'''
+        return self.__lat[:self.__size]
+
+    @property
+    def long(self) -> np.ndarray:
+        '''The longitude of each terrestrial node. This is NaN for satellites.'''
+        return self.__long[:self.__size]
+
+    @property
+    def altitude_km(self) -> np.ndarray:
+        '''The altitude of each terrestrial node. This is NaN for satellites.'''
+        return self.__altitude_km[:self.__size]
+
+    @property
+    def temperature_C(self) -> np.ndarray:
+        '''The current temperature of each satellite. This is NaN for other nodes.'''
+        return self.__temperature_C[:self.__size]
+
+    @property
+    def max_temp_C(self) -> np.ndarray:
+        '''The maximum operating temperature of each satellite. This is NaN for other nodes.'''
+        return self.__max_temp_C[:self.__size]
+
+    @property
+    def recommended_high_temp_C(self) -> np.ndarray:
+        '''The recommended highest temperature of each satellite. This is NaN for other nodes.'''
+        return self.__recommended_high_temp_C[:self.__size]
+
+    @property
+    def temp_inc_per_cpu_minute_C(self) -> np.ndarray:
+        '''The temperature increase per CPU core minute of each satellite. This is NaN for other nodes.'''
+        return self.__temp_inc_per_cpu_minute_C[:self.__size]
+
+    @property
+    def radiated_heat_per_minute_C(self) -> np.ndarray:
+        '''The temperature decrease per minute due to cooling of each satellite. This is NaN for other nodes.'''
+        return self.__radiated_heat_per_minute_C[:self.__size]
+
+    @property
+    def mocked_max_orbit_base_temp_C(self) -> np.ndarray:
+        '''The mocked max orbit base temperature of each satellite. This is NaN for other nodes.'''
+        return self.__mocked_max_orbit_base_temp_C[:self.__size]
+
+    @property
+    def row_versions(self) -> np.ndarray:
+        '''
+        The version of each row, which changes whenever the row is written, including when it is reverted by `restore()`.
+        Versions are never reused within a table, so a result computed from a row is valid as long as the row's version is unchanged.
+        '''
+        return self.__row_versions[:self.__size]
+
+
+    def add_row(self, node: 'Node', kind: NodeKind, cpu_arch: CpuArchitecture) -> int:
+        '''Adds a new row for the node and returns the node ID.'''
+        if self.__size == self.__capacity:
+            self.__grow(self.__capacity * 2)
+
+        node_id = self.__size
+        self.__size += 1
+        self.__nodes.append(node)
+        self.__bump_version(node_id)
+        self.__kind[node_id] = kind.value
+        self.__cpu_arch[node_id] = CPU_ARCH_CODES[cpu_arch]
+        self.__has_resource[node_id] = False
+        self.__free[node_id] = 0
+        self.__total[node_id] = 0
+        for column in self.__float_columns():
+            column[node_id] = np.nan
+        return node_id
+
+
+    def copy_row_from(self, src_table: 'NodeTable', src_id: int, node_id: int):
+        '''Copies all values of the row `src_id` of `src_table` into the row `node_id` of this table.'''
+        self.__before_write(node_id)
+        self.__kind[node_id] = src_table.__kind[src_id]
+        self.__cpu_arch[node_id] = src_table.__cpu_arch[src_id]
+        self.__has_resource[node_id] = src_table.__has_resource[src_id]
+        self.__free[node_id] = src_table.__free[src_id]
+        self.__total[node_id] = src_table.__total[src_id]
+        for dest, src in zip(self.__float_columns(), src_table.__float_columns()):
+            dest[node_id] = src[src_id]
+
+
+    def set_cpu_arch(self, node_id: int, cpu_arch: CpuArchitecture):
+        self.__before_write(node_id)
+        self.__cpu_arch[node_id] = CPU_ARCH_CODES[cpu_arch]
+
+
+    def set_resource(self, node_id: int, res_type: ResourceType, free_qty: int | None = None, total_qty: int | None = None):
+        '''Sets the free and/or total quantity of a resource. If the node did not have the resource before, the unset quantity is 0.'''
+        self.__before_write(node_id)
+        res_index = RESOURCE_INDEX[res_type]
+        self.__has_resource[node_id, res_index] = True
+        if free_qty is not None:
+            self.__free[node_id, res_index] = free_qty
+        if total_qty is not None:
+            self.__total[node_id, res_index] = total_qty
+
+
+    def remove_resource(self, node_id: int, res_type: ResourceType):
+        self.__before_write(node_id)
+        res_index = RESOURCE_INDEX[res_type]
+        self.__has_resource[node_id, res_index] = False
+        self.__free[node_id, res_index] = 0
+        self.__total[node_id, res_index] = 0
+
+
+    def allocate_resources(self, node_id: int, req_resources: dict[ResourceType, int]) -> bool:
+        '''Subtracts the requested resources from the free resources of the node if enough resources are available.'''
+        res_indices = [ RESOURCE_INDEX[res_type] for res_type in req_resources.keys() ]
+        req_qty = np.fromiter(req_resources.values(), dtype=np.int64, count=len(req_resources))
+        if not self.__has_resource[node_id, res_indices].all() or (self.__free[node_id, res_indices] < req_qty).any():
+            return False
+
+        self.__before_write(node_id)
+        self.__free[node_id, res_indices] -= req_qty
+        return True
+
+
+    def release_resources(self, node_id: int, released_resources: dict[ResourceType, int]):
+        '''Adds the released resources back to the free resources of the node. The free quantities never exceed the total capacities.'''
+        self.__before_write(node_id)
+        res_indices = [ RESOURCE_INDEX[res_type] for res_type in released_resources.keys() ]
+        released_qty = np.fromiter(released_resources.values(), dtype=np.int64, count=len(released_resources))
+        self.__free[node_id, res_indices] = np.minimum(self.__free[node_id, res_indices] + released_qty, self.__total[node_id, res_indices])
+
+
+    def set_location(self, node_id: int, lat: float, long: float, altitude_km: float):
+        self.__before_write(node_id)
+        self.__lat[node_id] = lat
+        self.__long[node_id] = long
+        self.__altitude_km[node_id] = altitude_km
+
+
+    def set_heat_info(
+        self,
+        node_id: int,
+        temperature_C: float,
+        max_temp_C: float,
+        recommended_high_temp_C: float,
+        temp_inc_per_cpu_minute_C: float,
+        radiated_heat_per_minute_C: float,
+        mocked_max_orbit_base_temp_C: float,
+    ):
+        self.__before_write(node_id)
+        self.__temperature_C[node_id] = temperature_C
+        self.__max_temp_C[node_id] = max_temp_C
+        self.__recommended_high_temp_C[node_id] = recommended_high_temp_C
+        self.__temp_inc_per_cpu_minute_C[node_id] = temp_inc_per_cpu_minute_C
+        self.__radiated_heat_per_minute_C[node_id] = radiated_heat_per_minute_C
+        self.__mocked_max_orbit_base_temp_C[node_id] = mocked_max_orbit_base_temp_C
+
+
+    def set_temperature(self, node_id: int, temperature_C: float):
+        self.__before_write(node_id)
+        self.__temperature_C[node_id] = temperature_C
+
+
+    def checkpoint(self) -> NodeTableCheckpoint:
+        '''Creates a checkpoint of the current state, which can later be restored using `restore()`.'''
+        checkpoint = NodeTableCheckpoint(self, len(self.__checkpoints), self.__size)
+        self.__checkpoints.append((checkpoint, {}))
+        return checkpoint
+
+
+    def restore(self, checkpoint: NodeTableCheckpoint):
+        '''
+        Reverts all modifications made since the checkpoint was created, including added rows.
+        All checkpoints created after this one are discarded, the checkpoint itself remains active and can be restored again.
+        '''
+        self.__check_active(checkpoint)
+        while len(self.__checkpoints) > checkpoint.level:
+            _, saved_rows = self.__checkpoints[-1]
+            for node_id, row in saved_rows.items():
+                if node_id < checkpoint.size:
+                    self.__write_row(node_id, row)
+            if len(self.__checkpoints) - 1 == checkpoint.level:
+                saved_rows.clear()
+                break
+            self.__checkpoints.pop()
+
+        self.__size = checkpoint.size
+        del self.__nodes[checkpoint.size:]
+
+
+    def discard(self, checkpoint: NodeTableCheckpoint):
+        '''
+        Discards the checkpoint and all checkpoints created after it without reverting any modifications.
+        The modifications remain revertible by the enclosing checkpoint, if there is one.
+        '''
+        self.__check_active(checkpoint)
+        while len(self.__checkpoints) > checkpoint.level:
+            _, saved_rows = self.__checkpoints.pop()
+            if len(self.__checkpoints) > 0:
+                parent, parent_rows = self.__checkpoints[-1]
+                for node_id, row in saved_rows.items():
+                    if node_id < parent.size and node_id not in parent_rows:
+                        parent_rows[node_id] = row
+
+
+    @property
+    def changed_rows_count(self) -> int:
+        '''The number of rows that have been modified since the most recent checkpoint was created.'''
+        if len(self.__checkpoints) == 0:
+            return 0
+        return len(self.__checkpoints[-1][1])
+
+
+    @staticmethod
+    def locate(nodes: Sequence['Node']) -> tuple['NodeTable', np.ndarray] | None:
+        '''
+        Returns the table that stores all the specified nodes and an array with their node IDs.
+        If the nodes are stored in different tables, None is returned.
+        '''
+        if len(nodes) == 0:
+            return None
+        table = nodes[0].table
+        for node in nodes:
+            if node.table is not table:
+                return None
+        node_ids = np.fromiter((node.node_id for node in nodes), dtype=np.intp, count=len(nodes))
+        return table, node_ids
+
+
+    @staticmethod
+    def for_nodes(nodes: Iterable['Node']) -> 'NodeTable':
+        '''
+        Returns a table that stores all the specified nodes, such that their node IDs are 0..n-1 in the iteration order.
+        If all of them are already stored in the same table with exactly these IDs, that table is returned.
+        Otherwise, all nodes are moved into a new table in the iteration order.
+        '''
+        nodes = list(nodes)
+        located = NodeTable.locate(nodes)
+        if located is not None and len(located[0]) == len(nodes) and np.array_equal(located[1], np.arange(len(nodes))):
+            return located[0]
+
+        table = NodeTable(len(nodes))
+        for node in nodes:
+            node._move_to(table)
+        return table
+
+
+    def __before_write(self, node_id: int):
+        '''
+        Assigns a new version to the row and saves its current values if this is the first write to it since the most recent checkpoint.
+        '''
+        self.__bump_version(node_id)
+        if len(self.__checkpoints) == 0:
+            return
+        checkpoint, saved_rows = self.__checkpoints[-1]
+        if node_id < checkpoint.size and node_id not in saved_rows:
+            saved_rows[node_id] = self.__read_row(node_id)
+
+
+    def __bump_version(self, node_id: int):
+        self.__version += 1
+        self.__row_versions[node_id] = self.__version
+
+
+    def __read_row(self, node_id: int) -> _RowState:
+        return (
+            self.__free[node_id].copy(),
+            self.__total[node_id].copy(),
+            self.__has_resource[node_id].copy(),
+            int(self.__cpu_arch[node_id]),
+            int(self.__kind[node_id]),
+            [ float(column[node_id]) for column in self.__float_columns() ],
+        )
+
+
+    def __write_row(self, node_id: int, row: _RowState):
+        free, total, has_resource, cpu_arch, kind, float_values = row
+        self.__bump_version(node_id)
+        self.__free[node_id] = free
+        self.__total[node_id] = total
+        self.__has_resource[node_id] = has_resource
+        self.__cpu_arch[node_id] = cpu_arch
+        self.__kind[node_id] = kind
+        for column, value in zip(self.__float_columns(), float_values):
+            column[node_id] = value
+
+
+    def __check_active(self, checkpoint: NodeTableCheckpoint):
+        if checkpoint.table is not self or checkpoint.level >= len(self.__checkpoints) or self.__checkpoints[checkpoint.level][0] is not checkpoint:
+            raise ValueError('The checkpoint is not active in this table.')
+
+
+    def __float_columns(self) -> list[np.ndarray]:
+        return [
+            self.__lat,
+            self.__long,
+            self.__altitude_km,
+            self.__temperature_C,
+            self.__max_temp_C,
+            self.__recommended_high_temp_C,
+            self.__temp_inc_per_cpu_minute_C,
+            self.__radiated_heat_per_minute_C,
+            self.__mocked_max_orbit_base_temp_C,
+        ]
+
+
+    def __grow(self, capacity: int):
+        def grow(array: np.ndarray) -> np.ndarray:
+            new_shape = (capacity,) + array.shape[1:]
+            new_array = np.zeros(new_shape, dtype=array.dtype)
+            new_array[:self.__size] = array[:self.__size]
+            return new_array
+
+        self.__free = grow(self.__free)
+        self.__total = grow(self.__total)
+        self.__has_resource = grow(self.__has_resource)
+        self.__cpu_arch = grow(self.__cpu_arch)
+        self.__kind = grow(self.__kind)
+        self.__lat = grow(self.__lat)
+        self.__long = grow(self.__long)
+        self.__altitude_km = grow(self.__altitude_km)
+        self.__temperature_C = grow(self.__temperature_C)
+        self.__max_temp_C = grow(self.__max_temp_C)
+        self.__recommended_high_temp_C = grow(self.__recommended_high_temp_C)
+        self.__temp_inc_per_cpu_minute_C = grow(self.__temp_inc_per_cpu_minute_C)
+        self.__radiated_heat_per_minute_C = grow(self.__radiated_heat_per_minute_C)
+        self.__mocked_max_orbit_base_temp_C = grow(self.__mocked_max_orbit_base_temp_C)
+        self.__row_versions = grow(self.__row_versions)
+        self.__capacity = capacity
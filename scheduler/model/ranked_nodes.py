@@ -0,0 +1,67 @@
+from typing import Sequence, overload
+import numpy as np
+from .node import EligibleNode, Node
+
+class RankedNodes(Sequence[EligibleNode]):
+    '''
+    The eligible nodes of a scheduling cycle, sorted from highest to lowest score.
+    Nodes with equal scores keep their original order.
+
+    The ranking is computed lazily: only the prefix of the sequence that is accessed is sorted using a partial selection
+    (`np.argpartition`), so accessing the top k of n nodes costs O(n + k log k) instead of O(n log n).
+    If more nodes are accessed, the sorted prefix is extended by at least doubling its length.
+    '''
+
+    def __init__(self, nodes: Sequence[Node], scores: np.ndarray, initial_count: int | None = None):
+        self.__nodes = nodes
+        self.__scores = scores
+        self.__ranking = np.zeros(0, dtype=np.intp)
+        '''The indices of the nodes in the sorted prefix.'''
+
+        # The composite key orders by descending score and then by ascending index. All keys are unique, so no stable sort is needed.
+        count = len(nodes)
+        if count > 0:
+            self.__keys = (int(scores.max()) - scores) * count + np.arange(count, dtype=np.int64)
+        else:
+            self.__keys = np.zeros(0, dtype=np.int64)
+
+        if initial_count is not None:
+            self.__extend(initial_count)
+
+
+    def __len__(self) -> int:
+        return len(self.__nodes)
+
+
+    @overload
+    def __getitem__(self, index: int) -> EligibleNode: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[EligibleNode]: ...
+
+    def __getitem__(self, index: int | slice) -> EligibleNode | Sequence[EligibleNode]:
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            return [ self[i] for i in indices ]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('RankedNodes index out of range')
+
+        if index >= len(self.__ranking):
+            self.__extend(max(index + 1, 2 * len(self.__ranking)))
+        node_index = int(self.__ranking[index])
+        return EligibleNode(self.__nodes[node_index], int(self.__scores[node_index]))
+
+
+    def __extend(self, count: int):
+        count = min(count, len(self.__nodes))
+        if count <= len(self.__ranking):
+            return
+
+        if count == len(self.__nodes):
+            self.__ranking = np.argsort(self.__keys)
+        else:
+            top = np.argpartition(self.__keys, count - 1)[:count]
+            self.__ranking = top[np.argsort(self.__keys[top])]
@@ -1,4 +1,4 @@
-from typing import Sequence, cast
+from typing import Hashable, Sequence, cast
 from .resources import CpuArchitecture, ResourceType
 from .slos import DataSourceSLO
 
@@ -54,6 +54,18 @@ class Task:
         '''
 
 
+    def equivalence_key(self) -> tuple[Hashable, ...]:
+        '''
+        Returns a key that is equal for all tasks with the same requirements, i.e., the same required resources,
+        the same set of CPU architectures, and the same shape of data source SLOs (the data sources themselves may differ).
+        '''
+        return (
+            tuple(sorted((res_type.value, qty) for res_type, qty in self.req_resources.items())),
+            tuple(sorted(arch.value for arch in self.cpu_architectures)),
+            tuple((slo.min_bandwidth_kpbs, slo.max_latency_msec) for slo in self.data_source_slos),
+        )
+
+
     def __hash__(self) -> int:
         return self.name.__hash__();
 
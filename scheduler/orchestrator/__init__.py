@@ -1,2 +1,6 @@
+from .latency_oracle import *
 from .nodes_manager import *
 from .orchestrator_client import *
+from .topology_diff import *
+from .topology_provider import *
+from .topology_store import *
@@ -0,0 +1,366 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Sequence, cast
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from .topology_diff import TopologyDiff
+
+class LatencyOracle(ABC):
+    '''
+    Answers latency queries on a network topology that changes over time.
+
+    Results are memoized per source node and time index.
+    By default, the memoized results are discarded as soon as a query for a different time index arrives.
+    '''
+
+    def __init__(self):
+        self.__time: int = -1
+
+
+    @abstractmethod
+    def get_latency(self, time: int, src: int, dest: int) -> float:
+        '''
+        Gets the latency in ms between the src node and the dest node at the specified time index.
+        If there is no path between src and dest, -1 is returned.
+        '''
+        pass
+
+
+    @abstractmethod
+    def get_latencies(self, time: int, src: int, dests: np.ndarray) -> np.ndarray:
+        '''
+        Gets the latencies in ms between the src node and each of the dest nodes at the specified time index.
+        For each dest node that cannot be reached from src, -1 is returned.
+        '''
+        pass
+
+
+    def get_latencies_within(self, time: int, src: int, dests: np.ndarray, limit: float) -> np.ndarray:
+        '''
+        Gets the latencies in ms between the src node and each of the dest nodes at the specified time index, if they are at most `limit`.
+        For each dest node that cannot be reached from src or whose latency is greater than `limit`, `np.inf` is returned.
+
+        The default implementation calls get_latencies(). Subclasses can override this to stop the path search at the limit.
+        '''
+        latencies = self.get_latencies(time, src, dests)
+        latencies[(latencies == -1) | (latencies > limit)] = np.inf
+        return latencies
+
+
+    def _check_time(self, time: int):
+        '''Notifies the oracle if the time index has changed.'''
+        if time != self.__time:
+            prev_time = self.__time
+            self.__time = time
+            self._on_time_changed(prev_time, time)
+
+
+    def _on_time_changed(self, prev_time: int, time: int):
+        '''Called when the first query for a new time index arrives. The default implementation clears all memoized results.'''
+        self._clear()
+
+
+    @abstractmethod
+    def _clear(self):
+        '''Clears all memoized results.'''
+        pass
+
+
+class GraphLatencyOracle(LatencyOracle):
+    '''
+    LatencyOracle that runs one single-source Dijkstra per source node and time index on a networkx graph
+    and memoizes the distances to all reachable nodes.
+    '''
+
+    def __init__(self, get_network_graph: Callable[[], nx.Graph]):
+        super().__init__()
+        self.__get_network_graph = get_network_graph
+        '''Returns the network graph of the current time index. The edge weights are stored in the `latency` attribute.'''
+
+        self.__distances: dict[int, dict[int, float]] = {}
+        self.__bounded_distances: dict[int, tuple[dict[int, float], float]] = {}
+        '''Maps a source node to the distances to all nodes within a limit and that limit.'''
+
+
+    def get_latency(self, time: int, src: int, dest: int) -> float:
+        distances = self.get_distances(time, src)
+        return distances.get(dest, -1)
+
+
+    def get_latencies_within(self, time: int, src: int, dests: np.ndarray, limit: float) -> np.ndarray:
+        '''Uses the unbounded distances if they have been computed already, otherwise runs a Dijkstra search with a cutoff at the limit.'''
+        self._check_time(time)
+        distances = self.__distances.get(src)
+        if distances is None:
+            entry = self.__bounded_distances.get(src)
+            if entry is None or entry[1] < limit:
+                graph = self.__get_network_graph()
+                entry = (cast(dict[int, float], nx.single_source_dijkstra_path_length(graph, src, cutoff=limit, weight='latency')), limit)
+                self.__bounded_distances[src] = entry
+            distances = entry[0]
+
+        latencies = np.fromiter((distances.get(dest, np.inf) for dest in dests.tolist()), dtype=np.float64, count=len(dests))
+        latencies[latencies > limit] = np.inf
+        return latencies
+
+
+    def get_latencies(self, time: int, src: int, dests: np.ndarray) -> np.ndarray:
+        distances = self.get_distances(time, src)
+        return np.fromiter((distances.get(dest, -1) for dest in dests.tolist()), dtype=np.float64, count=len(dests))
+
+
+    def get_distances(self, time: int, src: int) -> dict[int, float]:
+        '''
+        Gets the latencies in ms from the src node to all nodes reachable from it at the specified time index.
+        Nodes that are not reachable are not contained in the returned dictionary.
+        '''
+        self._check_time(time)
+        distances = self.__distances.get(src)
+        if distances is None:
+            graph = self.__get_network_graph()
+            distances = cast(dict[int, float], nx.single_source_dijkstra_path_length(graph, src, weight='latency'))
+            self.__distances[src] = distances
+        return distances
+
+
+    def _clear(self):
+        self.__distances.clear()
+        self.__bounded_distances.clear()
+
+
+class SparseLatencyOracle(LatencyOracle):
+    '''
+    LatencyOracle that keeps the topology as a sparse adjacency matrix and answers queries using `scipy.sparse.csgraph.dijkstra`.
+
+    Searches for multiple source nodes are run in a single call and can be bounded by a latency limit,
+    beyond which the search is not continued.
+
+    If a function for getting the TopologyDiff between time indices is provided, the memoized distances are only discarded
+    when the time index changes if the diff may affect them (see `TopologyDiff.affects_distances()`).
+    '''
+
+    def __init__(self, get_adjacency_matrix: Callable[[], sparse.csr_matrix], get_topology_diff: Callable[[], TopologyDiff | None] | None = None):
+        super().__init__()
+        self.__get_adjacency_matrix = get_adjacency_matrix
+        '''Returns the symmetric adjacency matrix of the current time index with the link latencies in ms as values.'''
+
+        self.__get_topology_diff = get_topology_diff
+        '''Returns the diff from the previously loaded topology to the one of the current time index or None if it is not available.'''
+
+        self.__distances: dict[int, tuple[np.ndarray, float]] = {}
+        '''Maps a source node to its distances row and the limit that was used for computing it.'''
+
+
+    def get_latency(self, time: int, src: int, dest: int) -> float:
+        latency = float(self.__get_row(time, src)[dest])
+        return latency if latency != np.inf else -1
+
+
+    def get_latencies(self, time: int, src: int, dests: np.ndarray) -> np.ndarray:
+        latencies = self.__get_row(time, src)[dests]
+        latencies[latencies == np.inf] = -1
+        return latencies
+
+
+    def get_latencies_within(self, time: int, src: int, dests: np.ndarray, limit: float) -> np.ndarray:
+        '''Runs a Dijkstra search that stops at the limit, unless distances with a higher limit have been computed already.'''
+        return self.get_distances(time, [ src ], limit)[0, dests]
+
+
+    def get_distances(self, time: int, srcs: Sequence[int], limit: float = np.inf) -> np.ndarray:
+        '''
+        Gets the latencies in ms from each of the srcs to all nodes at the specified time index.
+
+        Returns a matrix with one row per source node. Nodes that are not reachable or
+        whose latency is greater than `limit` have a latency of `np.inf`.
+        '''
+        self._check_time(time)
+
+        missing = [ src for src in dict.fromkeys(srcs) if not self.__has_distances(src, limit) ]
+        if len(missing) > 0:
+            self.__compute_distances(missing, limit)
+
+        ret = np.stack([ self.__distances[src][0] for src in srcs ])
+        if limit != np.inf:
+            ret[ret > limit] = np.inf
+        return ret
+
+
+    def _clear(self):
+        self.__distances.clear()
+
+
+    def _on_time_changed(self, prev_time: int, time: int):
+        diff = self.__get_topology_diff() if self.__get_topology_diff is not None else None
+        if diff is None or diff.from_time != prev_time or diff.to_time != time:
+            self._clear()
+            return
+        if diff.is_empty:
+            return
+
+        # Distances computed with a limit do not contain the distances beyond it, so we cannot check whether they are affected.
+        srcs = [ src for src, (_, limit) in self.__distances.items() if limit == np.inf ]
+        for src in [ src for src, (_, limit) in self.__distances.items() if limit != np.inf ]:
+            del self.__distances[src]
+        if len(srcs) == 0:
+            return
+
+        affected = diff.affects_distances(np.stack([ self.__distances[src][0] for src in srcs ]))
+        for src, is_affected in zip(srcs, affected.tolist()):
+            if is_affected:
+                del self.__distances[src]
+
+
+    def __get_row(self, time: int, src: int) -> np.ndarray:
+        self._check_time(time)
+        if not self.__has_distances(src, np.inf):
+            self.__compute_distances([ src ], np.inf)
+        return self.__distances[src][0]
+
+
+    def __compute_distances(self, srcs: list[int], limit: float):
+        adjacency = self.__get_adjacency_matrix()
+        distances = csgraph.dijkstra(adjacency, directed=True, indices=srcs, limit=limit)
+        for i, src in enumerate(srcs):
+            self.__distances[src] = (distances[i], limit)
+
+
+    def __has_distances(self, src: int, limit: float) -> bool:
+        entry = self.__distances.get(src)
+        return entry is not None and entry[1] >= limit
+
+
+@dataclass
+class GridShape:
+    '''
+    The shape of a constellation whose satellites are connected in a +Grid, i.e., each satellite has a link to its successor
+    in the same orbital plane and to the satellite with the same index in the next plane.
+    The satellite IDs are ordered by orbital plane and then by index in the plane, like in StarryNet.
+    '''
+
+    orbits_count: int
+    sats_per_orbit: int
+
+    @property
+    def satellites_count(self) -> int:
+        return self.orbits_count * self.sats_per_orbit
+
+
+class GridLatencyOracle(LatencyOracle):
+    '''
+    LatencyOracle that estimates the latencies between satellites of a +Grid constellation analytically instead of running a graph search.
+
+    For a satellite pair, all paths that traverse the source plane to some index j, cross the planes at index j,
+    and traverse the destination plane from j to the destination are evaluated at once using prefix sums over the link latencies,
+    which costs O(sats_per_orbit) per pair. The estimate is the latency of an actual path, so it is never lower than the exact latency.
+    Since ground nodes have only a few links, they are never used as transit hops between satellites.
+
+    Queries that involve other nodes, queries for many destinations (for which a single Dijkstra run is cheaper),
+    and time indices at which the topology is not a complete +Grid are delegated to the fallback oracle.
+    '''
+
+    def __init__(self, grid: GridShape, get_adjacency_matrix: Callable[[], sparse.csr_matrix], fallback: LatencyOracle):
+        super().__init__()
+        self.__grid = grid
+        self.__get_adjacency_matrix = get_adjacency_matrix
+        '''Returns the symmetric adjacency matrix of the current time index with the link latencies in ms as values.'''
+
+        self.__fallback = fallback
+        self.__prefix_sums: tuple[np.ndarray, np.ndarray] | None = None
+        '''The prefix sums of the intra-plane and inter-plane link latencies of the current time index.'''
+
+        self.__is_grid: bool | None = None
+        '''True if the topology of the current time index is a complete +Grid. None if this has not been checked yet.'''
+
+
+    def get_latency(self, time: int, src: int, dest: int) -> float:
+        return float(self.get_latencies(time, src, np.array([ dest ], dtype=np.intp))[0])
+
+
+    def get_latencies(self, time: int, src: int, dests: np.ndarray) -> np.ndarray:
+        self._check_time(time)
+        sats_count = self.__grid.satellites_count
+        if src >= sats_count or len(dests) * self.__grid.sats_per_orbit > self.__get_adjacency_matrix().shape[0] or not self.__check_grid():
+            return self.__fallback.get_latencies(time, src, dests)
+
+        is_sat = dests < sats_count
+        if is_sat.all():
+            return self.__estimate(src, dests)
+
+        latencies = np.empty(len(dests), dtype=np.float64)
+        latencies[is_sat] = self.__estimate(src, dests[is_sat])
+        latencies[~is_sat] = self.__fallback.get_latencies(time, src, dests[~is_sat])
+        return latencies
+
+
+    def _clear(self):
+        self.__prefix_sums = None
+        self.__is_grid = None
+
+
+    def __check_grid(self) -> bool:
+        if self.__is_grid is None:
+            self.__prefix_sums = self.__compute_prefix_sums()
+            self.__is_grid = self.__prefix_sums is not None
+        return self.__is_grid
+
+
+    def __compute_prefix_sums(self) -> tuple[np.ndarray, np.ndarray] | None:
+        '''
+        Computes the prefix sums of the link latencies, with each ring of links repeated twice to allow wrapping around.
+        Returns None if a +Grid link is missing.
+
+        intra[p, i] is the latency from index 0 to index i (mod sats_per_orbit) in plane p in ascending direction.
+        inter[i, j] is the latency from plane 0 to plane i (mod orbits_count) along index j in ascending direction.
+        '''
+        grid = self.__grid
+        if grid.orbits_count < 3 or grid.sats_per_orbit < 3:
+            return None
+
+        adjacency = self.__get_adjacency_matrix()
+        sat_ids = np.arange(grid.satellites_count).reshape(grid.orbits_count, grid.sats_per_orbit)
+        intra_latencies = np.asarray(adjacency[sat_ids.ravel(), np.roll(sat_ids, -1, axis=1).ravel()]).reshape(sat_ids.shape)
+        inter_latencies = np.asarray(adjacency[sat_ids.ravel(), np.roll(sat_ids, -1, axis=0).ravel()]).reshape(sat_ids.shape)
+        # A latency of 0 means that the link does not exist.
+        if not (intra_latencies > 0).all() or not (inter_latencies > 0).all():
+            return None
+
+        intra = np.zeros((grid.orbits_count, 2 * grid.sats_per_orbit + 1), dtype=np.float64)
+        np.cumsum(np.concatenate((intra_latencies, intra_latencies), axis=1), axis=1, out=intra[:, 1:])
+        inter = np.zeros((2 * grid.orbits_count + 1, grid.sats_per_orbit), dtype=np.float64)
+        np.cumsum(np.concatenate((inter_latencies, inter_latencies), axis=0), axis=0, out=inter[1:])
+        return intra, inter
+
+
+    def __estimate(self, src: int, dests: np.ndarray) -> np.ndarray:
+        intra, inter = cast(tuple[np.ndarray, np.ndarray], self.__prefix_sums)
+        orbits_count = self.__grid.orbits_count
+        sats_per_orbit = self.__grid.sats_per_orbit
+        src_plane, src_index = divmod(src, sats_per_orbit)
+        dest_planes = dests // sats_per_orbit
+        dest_indices = (dests % sats_per_orbit)[:, np.newaxis]
+        # The indices at which the planes are crossed. The latency arrays below have the shape (dests, crossing indices).
+        crossing_indices = np.arange(sats_per_orbit)[np.newaxis, :]
+
+        src_plane_latencies = _ring_latencies(intra[src_plane][np.newaxis, :], np.full_like(crossing_indices, src_index), crossing_indices, sats_per_orbit)
+        dest_plane_latencies = _ring_latencies(intra[dest_planes], np.broadcast_to(crossing_indices, (len(dests), sats_per_orbit)), dest_indices, sats_per_orbit)
+
+        ascending = inter[src_plane + (dest_planes - src_plane) % orbits_count] - inter[src_plane][np.newaxis, :]
+        descending = inter[dest_planes + (src_plane - dest_planes) % orbits_count] - inter[dest_planes]
+        crossing_latencies = np.minimum(ascending, descending)
+
+        return (src_plane_latencies + crossing_latencies + dest_plane_latencies).min(axis=1)
+
+
+def _ring_latencies(prefix_sums: np.ndarray, starts: np.ndarray, ends: np.ndarray, ring_size: int) -> np.ndarray:
+    '''
+    Computes the latencies from the start indices to the end indices along rings of links in the shorter direction.
+    `prefix_sums` contains one row per ring (see `GridLatencyOracle.__compute_prefix_sums()`), which is broadcast against starts and ends.
+    '''
+    starts, ends = np.broadcast_arrays(starts, ends)
+    prefix_sums = np.broadcast_to(prefix_sums, starts.shape[:-1] + prefix_sums.shape[-1:])
+    ascending = np.take_along_axis(prefix_sums, starts + (ends - starts) % ring_size, axis=-1) - np.take_along_axis(prefix_sums, starts, axis=-1)
+    descending = np.take_along_axis(prefix_sums, ends + (starts - ends) % ring_size, axis=-1) - np.take_along_axis(prefix_sums, ends, axis=-1)
+    return np.minimum(ascending, descending)
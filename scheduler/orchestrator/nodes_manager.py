@@ -1,9 +1,49 @@
 
-from scheduler.model import AvailableNodes, AvailableNodesIndexed, Node, SatelliteNode, Task
+import heapq
+import math
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import cast
+from scheduler.model import AvailableNodes, AvailableNodesIndexed, Node, NodeTable, NodeTableCheckpoint, ResourceType, SatelliteNode, Task
 from scheduler.util import index_nodes, HeatEstimator
 
+@dataclass(order=True)
+class RunningTask:
+    '''A task that has been assigned to a node and will release its resources once it finishes.'''
+
+    finish_time: int
+    '''The time index at which the task finishes.'''
+
+    seq: int
+    '''Sequence number to release tasks with the same finish time in the order in which they were assigned.'''
+
+    task: Task = field(compare=False)
+    node: Node = field(compare=False)
+    resources: dict[ResourceType, int] = field(compare=False)
+    '''The resources that were allocated for the task.'''
+
+    temperature_C: float = field(compare=False, default=math.nan)
+    '''The estimated temperature of the satellite while the task is running. This is NaN for other nodes.'''
+
+
+@dataclass
+class NodesCheckpoint:
+    '''A checkpoint of the state of all nodes managed by a NodesManager, which is created by `NodesManager.checkpoint()`.'''
+    table_checkpoint: NodeTableCheckpoint
+    running_tasks: list[RunningTask]
+    base_temps_C: dict[Node, float]
+    seq: int
+
+
 class NodesManager:
-    '''Maintains a directory of all nodes.'''
+    '''
+    Maintains a directory of all nodes.
+
+    Tasks that are assigned with a finish time are tracked in a min-heap ordered by their finish time.
+    release_finished_tasks() releases their resources and cools down the satellites once they have finished.
+    Since the temperature estimates are absolute values, the temperature of a satellite is not reverted by subtracting increases,
+    but recomputed from its base temperature (the temperature before its first running task) and the estimates of its remaining running tasks.
+    '''
 
     def __init__(self, nodes: AvailableNodes):
         self.all_nodes = AvailableNodesIndexed(
@@ -12,41 +52,121 @@ class NodesManager:
             edge_nodes=index_nodes(nodes.edge_nodes),
             satellites=index_nodes(nodes.satellites),
         )
+        self.node_table = NodeTable.for_nodes(chain(nodes.satellites, nodes.edge_nodes, nodes.ground_stations, nodes.cloud_nodes))
+        '''
+        The table that stores the state of all nodes.
+        The node IDs are dense and assigned in the order satellites, edge nodes, ground stations, cloud nodes,
+        which matches the node IDs used in the network topology.
+        '''
+
+        self.__nodes_by_name: dict[str, Node] = { node.name: node for node in self.node_table.nodes }
+
         self.__heat_estimator = HeatEstimator()
+        self.__running_tasks: list[RunningTask] = []
+        self.__base_temps_C: dict[Node, float] = {}
+        '''Maps each satellite with running tasks to its temperature before the first of these tasks was assigned.'''
+        self.__seq = 0
 
 
-    def get_node_by_name(self, name: str) -> Node | None:
-        '''Gets a node using its name.'''
-        node = self.all_nodes.satellites.get(name)
-        if node:
-            return node
+    @property
+    def running_tasks_count(self) -> int:
+        '''The number of tasks that have been assigned with a finish time and have not been released yet.'''
+        return len(self.__running_tasks)
+
 
-        node = self.all_nodes.ground_stations.get(name)
-        if node:
-            return node
+    @property
+    def next_finish_time(self) -> int | None:
+        '''The earliest finish time of all running tasks or None if no tasks are running.'''
+        if len(self.__running_tasks) == 0:
+            return None
+        return self.__running_tasks[0].finish_time
 
-        node = self.all_nodes.edge_nodes.get(name)
-        if node:
-            return node
 
-        return self.all_nodes.cloud_nodes.get(name)
+    def get_node_by_name(self, name: str) -> Node | None:
+        '''Gets a node using its name.'''
+        return self.__nodes_by_name.get(name)
 
 
-    def assign_task(self, task: Task, target_node: Node) -> bool:
-        '''Assigns the task to the target node if enough resources are available.'''
+    def get_node_by_id(self, node_id: int) -> Node:
+        '''Gets a node using its node ID.'''
+        return self.node_table.nodes[node_id]
 
-        # Check if the resources are available.
-        for key, req_qty in task.req_resources.items():
-            available_qty = target_node.resources.get(key, None)
-            if available_qty is None or available_qty < req_qty:
-                return False
 
-        # Assign the resources:
-        for key, req in task.req_resources.items():
-            target_node.resources[key] -= req
+    def assign_task(self, task: Task, target_node: Node, finish_time: int | None = None) -> bool:
+        '''
+        Assigns the task to the target node if enough resources are available.
+        If a finish_time is specified, the resources are released again by release_finished_tasks() once that time has been reached.
+        '''
+
+        # Check if the resources are available and assign them.
+        if not target_node.table.allocate_resources(target_node.node_id, task.req_resources):
+            return False
 
         # If the node is a satellite, update its temperature
+        temperature_C = math.nan
         if isinstance(target_node, SatelliteNode):
-            target_node.heat_status.temperature_C = self.__heat_estimator.estimate_max_temp(target_node, task)
+            if finish_time is not None:
+                self.__base_temps_C.setdefault(target_node, target_node.heat_status.temperature_C)
+            temperature_C = self.__heat_estimator.estimate_max_temp(target_node, task)
+            target_node.heat_status.temperature_C = temperature_C
+
+        if finish_time is not None:
+            running_task = RunningTask(finish_time, self.__seq, task, target_node, dict(task.req_resources), temperature_C)
+            heapq.heappush(self.__running_tasks, running_task)
+            self.__seq += 1
 
         return True
+
+
+    def checkpoint(self) -> NodesCheckpoint:
+        '''
+        Creates a checkpoint of the state of all nodes and the running tasks, which can later be restored using `restore()`.
+        See `NodeTable.checkpoint()` for details.
+        '''
+        return NodesCheckpoint(self.node_table.checkpoint(), list(self.__running_tasks), dict(self.__base_temps_C), self.__seq)
+
+
+    def restore(self, checkpoint: NodesCheckpoint):
+        '''Reverts the state of all nodes and the running tasks to the checkpoint. The checkpoint remains active and can be restored again.'''
+        self.node_table.restore(checkpoint.table_checkpoint)
+        self.__running_tasks = list(checkpoint.running_tasks)
+        self.__base_temps_C = dict(checkpoint.base_temps_C)
+        self.__seq = checkpoint.seq
+
+
+    def release_finished_tasks(self, time: int) -> list[RunningTask]:
+        '''
+        Releases the resources of all tasks whose finish time is less than or equal to the specified time index
+        and recomputes the temperature of the satellites they ran on. Returns the released tasks in the order of their finish times.
+        '''
+        released: list[RunningTask] = []
+        cooled_sats: set[Node] = set()
+        while len(self.__running_tasks) > 0 and self.__running_tasks[0].finish_time <= time:
+            running_task = heapq.heappop(self.__running_tasks)
+            node = running_task.node
+            node.table.release_resources(node.node_id, running_task.resources)
+            if isinstance(node, SatelliteNode):
+                cooled_sats.add(node)
+            released.append(running_task)
+
+        if len(cooled_sats) > 0:
+            self.__recompute_temperatures(cooled_sats)
+        return released
+
+
+    def __recompute_temperatures(self, sats: set[Node]):
+        '''
+        Sets the temperature of each satellite to the highest estimate of its remaining running tasks, but not below its base temperature.
+        Satellites without remaining running tasks return to their base temperature.
+        '''
+        temps_C = { sat: self.__base_temps_C[sat] for sat in sats if sat in self.__base_temps_C }
+        remaining_sats: set[Node] = set()
+        for running_task in self.__running_tasks:
+            if running_task.node in temps_C:
+                temps_C[running_task.node] = max(temps_C[running_task.node], running_task.temperature_C)
+                remaining_sats.add(running_task.node)
+
+        for sat, temp_C in temps_C.items():
+            cast(SatelliteNode, sat).heat_status.temperature_C = temp_C
+            if sat not in remaining_sats:
+                del self.__base_temps_C[sat]
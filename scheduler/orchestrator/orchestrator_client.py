@@ -1,14 +1,30 @@
 from abc import ABC, abstractmethod
+from typing import Sequence
+import numpy as np
 from scheduler.model import Node, SatelliteNode, Task
 
 class OrchestratorClient(ABC):
     '''Provides access to the underlying orchestrator.'''
 
+    @property
+    @abstractmethod
+    def time_index(self) -> int:
+        '''
+        The index of the current snapshot of the satellite positions and network links.
+        Data derived from them can be cached as long as this value does not change.
+        '''
+        pass
+
     @abstractmethod
     def get_node_by_name(self, name: str) -> Node | None:
         '''Gets a node using its name.'''
         pass
 
+    @abstractmethod
+    def get_node_by_id(self, node_id: int) -> Node:
+        '''Gets a node using its integer node ID.'''
+        pass
+
     @abstractmethod
     def get_latency(self, src: Node, dest: Node) -> float:
         '''
@@ -17,6 +33,37 @@ class OrchestratorClient(ABC):
         '''
         pass
 
+    def get_latencies(self, src: Node, dests: Sequence[Node]) -> np.ndarray:
+        '''
+        Gets the current latencies in ms between the src node and each of the dest nodes.
+        The returned array contains one entry per dest node. If there is no path between src and a dest node, its entry is -1.
+
+        The default implementation calls get_latency() for every dest node. Subclasses should override this with a vectorized implementation.
+        '''
+        return np.fromiter((self.get_latency(src, dest) for dest in dests), dtype=np.float64, count=len(dests))
+
+    def get_latencies_within(self, src: Node, dests: Sequence[Node], max_latency_msec: float) -> np.ndarray:
+        '''
+        Gets the current latencies in ms between the src node and each of the dest nodes, if they are at most max_latency_msec.
+        The entries of dest nodes whose latency is greater than max_latency_msec or that cannot be reached are `np.inf`.
+        This allows the orchestrator to stop the path search once the latency limit has been exceeded.
+
+        The default implementation calls get_latencies(). Subclasses should override this with a bounded search.
+        '''
+        latencies = self.get_latencies(src, dests)
+        latencies[(latencies == -1) | (latencies > max_latency_msec)] = np.inf
+        return latencies
+
+    def get_latencies_over_time(self, srcs: Sequence[Node], dests: Sequence[Node], duration_msec: int) -> np.ndarray:
+        '''
+        Gets the predicted latencies in ms between each of the src nodes and each of the dest nodes
+        at every time index from the current one until duration_msec have elapsed.
+        The returned array has the shape (srcs, time indices, dests). If there is no path between a src and a dest node at a time index, its entry is -1.
+
+        The default implementation cannot predict the topology and only returns the current latencies as a single time index.
+        '''
+        return np.stack([ self.get_latencies(src, dests) for src in srcs ])[:, np.newaxis, :]
+
     @abstractmethod
     def assign_task(self, task: Task, target_node: Node) -> bool:
         '''Assigns the task to the target node if enough resources are available.'''
@@ -27,3 +74,15 @@ class OrchestratorClient(ABC):
         '''Gets the specified satellite's position as a tuple (lat, long, altitude_km)'''
         pass
 
+    def get_satellite_positions(self, nodes: Sequence[SatelliteNode]) -> np.ndarray:
+        '''
+        Gets the positions of the specified satellites as an array of shape (len(nodes), 3),
+        where each row contains (lat, long, altitude_km).
+
+        The default implementation calls get_satellite_position() for every node. Subclasses should override this with a vectorized implementation.
+        '''
+        positions = np.zeros((len(nodes), 3), dtype=np.float64)
+        for i, node in enumerate(nodes):
+            positions[i] = self.get_satellite_position(node)
+        return positions
+
@@ -1,2 +1,5 @@
+from .simulation_engine import *
 from .starrynet_client import *
 from .starrynet_time_svc import *
+from .starrynet_topology import *
+from .walker_topology import *
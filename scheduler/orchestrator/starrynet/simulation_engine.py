@@ -0,0 +1,96 @@
+import heapq
+from dataclasses import dataclass, field
+from enum import Enum
+from .starrynet_time_svc import SimulationAction, StarryNetTimeService
+
+class EventKind(Enum):
+    '''
+    The kind of a simulation event.
+    Events with the same time index are processed in the order of their kind's value and then in the order in which they were scheduled.
+    '''
+
+    TOPOLOGY_UPDATE = 0
+    '''Updates the network topology. This is processed first, so that all other events of a time index see the current topology.'''
+
+    TASK_COMPLETION = 1
+    '''A task has completed and releases its resources. This is processed before scheduling, so that the released resources are available.'''
+
+    SCHEDULING = 2
+    '''A scheduling request.'''
+
+
+@dataclass(order=True)
+class SimulationEvent:
+    time: int
+    '''The time index, at which the event occurs.'''
+
+    priority: int
+    '''The value of the event's kind.'''
+
+    seq: int
+    '''Sequence number to process events with the same time and priority in the order in which they were scheduled.'''
+
+    kind: EventKind = field(compare=False)
+    action: SimulationAction = field(compare=False)
+
+
+class SimulationEngine:
+    '''
+    Discrete-event simulation engine, which advances the StarryNetTimeService directly from one event to the next.
+
+    Events are kept in a priority queue, so time indices without events are skipped and any number of events
+    can be processed at the same time index. Actions may schedule further events while the simulation is running.
+    '''
+
+    def __init__(self, time_svc: StarryNetTimeService):
+        self.__time_svc = time_svc
+        self.__events: list[SimulationEvent] = []
+        self.__seq = 0
+
+
+    @property
+    def now(self) -> int:
+        '''Gets the current time index.'''
+        return self.__time_svc.curr_time
+
+
+    @property
+    def pending_events(self) -> int:
+        '''Gets the number of events that have not been processed yet.'''
+        return len(self.__events)
+
+
+    def schedule(self, time: int, kind: EventKind, action: SimulationAction):
+        '''
+        Schedules the action to be called at the specified time index.
+        The argument to the action is the time index.
+        '''
+        if time < self.now:
+            raise ValueError(f'Cannot schedule an event at time {time}, because the current time is {self.now}.')
+        heapq.heappush(self.__events, SimulationEvent(time, kind.value, self.__seq, kind, action))
+        self.__seq += 1
+
+
+    def schedule_after(self, delay: int, kind: EventKind, action: SimulationAction):
+        '''Schedules the action to be called `delay` time indices after the current time index.'''
+        self.schedule(self.now + delay, kind, action)
+
+
+    def run(self) -> int:
+        '''
+        Processes all events in order until the queue is empty or the simulation duration of the time service has been reached.
+        Events after the end of the simulation are discarded. Returns the number of processed events.
+        '''
+        processed = 0
+        last_time = -1
+        while len(self.__events) > 0:
+            event = heapq.heappop(self.__events)
+            if self.__time_svc.advance_to(event.time) == -1:
+                self.__events.clear()
+                break
+            if event.time != last_time:
+                print(f'Experiment clock at {event.time}')
+                last_time = event.time
+            event.action(event.time)
+            processed += 1
+        return processed
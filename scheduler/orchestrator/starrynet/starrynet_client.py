@@ -1,82 +1,263 @@
-from typing import cast
+from enum import Enum
+from typing import Sequence
 import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
 from scheduler.model import Node, SatelliteNode, Task
-from scheduler.orchestrator import NodesManager, OrchestratorClient
+from scheduler.orchestrator import GraphLatencyOracle, GridLatencyOracle, GridShape, LatencyOracle, NodesManager, OrchestratorClient, RunningTask, SparseLatencyOracle, TopologyDiff, TopologyProvider
+from scheduler.orchestrator.starrynet.simulation_engine import EventKind, SimulationEngine
 from scheduler.orchestrator.starrynet.starrynet_time_svc import StarryNetTimeService
-from starrynet.starrynet.sn_synchronizer import StarryNet
+
+class RoutingBackend(Enum):
+    '''The data structure used for computing latencies between nodes.'''
+
+    SPARSE = 'sparse'
+    '''Keeps the topology as a sparse adjacency matrix and uses `scipy.sparse.csgraph` for path searches.'''
+
+    NETWORKX = 'networkx'
+    '''Materializes the topology as a networkx graph and uses networkx for path searches.'''
+
+    GRID = 'grid'
+    '''
+    Estimates the latencies between satellites analytically from the structure of the +Grid inter-satellite links (see `GridLatencyOracle`)
+    and uses the SPARSE backend for all other latencies. The estimates may be slightly higher than the exact latencies.
+    '''
+
 
 class StarryNetClient(OrchestratorClient):
+    '''
+    OrchestratorClient for StarryNet simulations.
+    The topology is obtained from a TopologyProvider, which reads it either directly from StarryNet (StarryNetTopology) or from a precomputed TopologyStore.
+    The nodes are identified in the topology by their node IDs, which are assigned by the NodesManager.
 
-    def __init__(self, nodes_mgr: NodesManager, sn: StarryNet, time_svc: StarryNetTimeService):
+    When the time index changes, the diff between the previous and the current topology is available through get_topology_diff().
+    It is used to update the networkx graph in place and to keep the memoized latencies that are not affected by the changes.
+    '''
+
+    def __init__(
+        self,
+        nodes_mgr: NodesManager,
+        topology: TopologyProvider,
+        time_svc: StarryNetTimeService,
+        routing_backend: RoutingBackend = RoutingBackend.SPARSE,
+        grid_shape: GridShape | None = None,
+        sim_engine: SimulationEngine | None = None,
+    ):
+        '''
+        `routing_backend`: the data structure used for computing latencies.
+        `grid_shape`: the shape of the +Grid constellation, which is required by the GRID routing backend.
+        `sim_engine`: if specified, a TASK_COMPLETION event that calls release_finished_tasks() is scheduled for the finish time of every assigned task.
+        Otherwise, release_finished_tasks() must be called by the owner of the simulation.
+        '''
         self.__nodes_mgr = nodes_mgr
-        self.__sn = sn
+        self.__topology = topology
         self.__time_svc = time_svc
+        self.__sim_engine = sim_engine
+        self.__completion_times: set[int] = set()
+        '''The time indices, for which a TASK_COMPLETION event has been scheduled and not been processed yet.'''
+        self.__nodes_count = self.__count_nodes()
+        self.__adjacency_time: int = -1
+        self.__adjacency: sparse.csr_matrix = sparse.csr_matrix((self.__nodes_count, self.__nodes_count))
+        self.__prev_adjacency_time: int = -1
+        self.__prev_adjacency: sparse.csr_matrix | None = None
+        self.__topology_diff: TopologyDiff | None = None
+        '''The diff from the previous to the current adjacency matrix, which is computed when it is first requested.'''
         self.__network_graph_time: int = -1
-        self.__network_graph: nx.Graph = self.__build_network_graph()
+        self.__network_graph: nx.Graph = nx.empty_graph(self.__nodes_count)
         self.__sat_positions_time: int = -1
-        self.__sat_positions: list[tuple[float, float, float]] = []
+        self.__sat_positions: np.ndarray = np.zeros((0, 3), dtype=np.float64)
+        self.__window_distances: dict[int, dict[int, np.ndarray]] = {}
+        '''
+        Maps a time index to the distances rows of the source nodes that have been used in get_latencies_over_time().
+        Since the topology of a time index does not change, the rows are kept until the time index has passed.
+        '''
+        self.__routing_backend = routing_backend
+        self.__latency_oracle: LatencyOracle
+        if routing_backend == RoutingBackend.SPARSE:
+            self.__latency_oracle = SparseLatencyOracle(self.get_adjacency_matrix, self.get_topology_diff)
+        elif routing_backend == RoutingBackend.GRID:
+            if grid_shape is None:
+                raise ValueError('The GRID routing backend requires a grid_shape.')
+            fallback = SparseLatencyOracle(self.get_adjacency_matrix, self.get_topology_diff)
+            self.__latency_oracle = GridLatencyOracle(grid_shape, self.get_adjacency_matrix, fallback)
+        else:
+            self.__latency_oracle = GraphLatencyOracle(self.get_network_graph)
+
+
+    @property
+    def time_index(self) -> int:
+        return self.__time_svc.curr_time
 
 
     def get_node_by_name(self, name: str) -> Node | None:
         return self.__nodes_mgr.get_node_by_name(name)
 
 
+    def get_node_by_id(self, node_id: int) -> Node:
+        return self.__nodes_mgr.get_node_by_id(node_id)
+
+
     def get_latency(self, src: Node, dest: Node) -> float:
-        graph = self.get_network_graph()
-        path: list[int]
-        try:
-            path = cast(list[int], nx.shortest_path(graph, int(src.name), int(dest.name), 'latency'))
-        except nx.NetworkXNoPath as ex:
-            return -1
-
-        total_latency = 0.0
-        u: int | None = None
-        for v in path:
-            if u is not None:
-                latency = graph.get_edge_data(u, v)['latency']
-                total_latency += latency
-            u = v
-        return total_latency
+        return self.__latency_oracle.get_latency(self.__time_svc.curr_time, src.node_id, dest.node_id)
+
+
+    def get_latencies(self, src: Node, dests: Sequence[Node]) -> np.ndarray:
+        dest_ids = np.fromiter((dest.node_id for dest in dests), dtype=np.intp, count=len(dests))
+        return self.__latency_oracle.get_latencies(self.__time_svc.curr_time, src.node_id, dest_ids)
+
+
+    def get_latencies_within(self, src: Node, dests: Sequence[Node], max_latency_msec: float) -> np.ndarray:
+        dest_ids = np.fromiter((dest.node_id for dest in dests), dtype=np.intp, count=len(dests))
+        return self.__latency_oracle.get_latencies_within(self.__time_svc.curr_time, src.node_id, dest_ids, max_latency_msec)
+
+
+    def get_latencies_over_time(self, srcs: Sequence[Node], dests: Sequence[Node], duration_msec: int) -> np.ndarray:
+        '''
+        Predicts the latencies using the topologies of the time indices, during which a task that starts now and runs for duration_msec would be executing,
+        limited to the simulation duration. For each time index, a single multi-source Dijkstra search is run for all srcs.
+        The distances are kept for subsequent calls until their time index has passed, so a sliding window only needs to compute the new time indices.
+        '''
+        start = self.__time_svc.curr_time
+        end = max(start, min(start + StarryNetTimeService.to_time_indices(duration_msec) - 1, self.__time_svc.sim_duration))
+        src_ids = [ src.node_id for src in srcs ]
+        dest_ids = np.fromiter((dest.node_id for dest in dests), dtype=np.intp, count=len(dests))
+
+        for time in [ time for time in self.__window_distances.keys() if time < start ]:
+            del self.__window_distances[time]
+
+        latencies = np.empty((len(srcs), end - start + 1, len(dests)), dtype=np.float64)
+        for i, time in enumerate(range(start, end + 1)):
+            distances = self.__get_window_distances(time, src_ids)
+            for j, src_id in enumerate(src_ids):
+                latencies[j, i] = distances[src_id][dest_ids]
+        latencies[latencies == np.inf] = -1
+        return latencies
 
 
     def assign_task(self, task: Task, target_node: Node) -> bool:
-        return self.__nodes_mgr.assign_task(task, target_node)
+        '''
+        Assigns the task to the target node. If the task has an expected execution time for the node's CPU architecture,
+        its resources are released by release_finished_tasks() once that time has elapsed.
+        '''
+        finish_time: int | None = None
+        exec_time_msec = task.expected_exec_time_msec.get(target_node.cpu_arch)
+        if exec_time_msec is not None:
+            finish_time = self.__time_svc.curr_time + StarryNetTimeService.to_time_indices(exec_time_msec)
+        if not self.__nodes_mgr.assign_task(task, target_node, finish_time):
+            return False
+
+        if finish_time is not None and self.__sim_engine is not None and finish_time not in self.__completion_times:
+            self.__completion_times.add(finish_time)
+            self.__sim_engine.schedule(finish_time, EventKind.TASK_COMPLETION, self.__on_task_completion)
+        return True
+
+
+    def release_finished_tasks(self) -> list[RunningTask]:
+        '''Releases the resources of all tasks that have finished by the current time index.'''
+        return self.__nodes_mgr.release_finished_tasks(self.__time_svc.curr_time)
+
+
+    @property
+    def next_task_finish_time(self) -> int | None:
+        '''The time index at which the next running task finishes or None if no tasks are running.'''
+        return self.__nodes_mgr.next_finish_time
 
 
     def get_satellite_position(self, node: SatelliteNode) -> tuple[float, float, float]:
-        if self.__sat_positions_time != self.__time_svc.curr_time:
-            self.__sat_positions = self.__sn.get_positions(self.__time_svc.curr_time)
-            self.__sat_positions_time = self.__time_svc.curr_time
-        return self.__sat_positions[int(node.name)]
+        self.__update_sat_positions()
+        lat, long, altitude_km = self.__sat_positions[node.node_id].tolist()
+        return (lat, long, altitude_km)
+
+
+    def get_satellite_positions(self, nodes: Sequence[SatelliteNode]) -> np.ndarray:
+        self.__update_sat_positions()
+        node_ids = np.fromiter((node.node_id for node in nodes), dtype=np.intp, count=len(nodes))
+        return self.__sat_positions[node_ids]
+
+
+    def update_topology(self):
+        '''Ensures that the network topology needed by the routing backend has been loaded for the current time index.'''
+        if self.__routing_backend == RoutingBackend.NETWORKX:
+            self.get_network_graph()
+        else:
+            self.get_adjacency_matrix()
+
+
+    def get_adjacency_matrix(self) -> sparse.csr_matrix:
+        '''
+        Gets the symmetric adjacency matrix of the current network topology.
+        Each stored value is the latency in ms of the link between the row node and the column node.
+        '''
+        if self.__adjacency_time != self.__time_svc.curr_time:
+            self.__update_adjacency_matrix()
+        return self.__adjacency
 
 
     def get_network_graph(self) -> nx.Graph:
+        '''
+        Gets the current network topology as a networkx graph, with the link latencies stored in the `latency` edge attribute.
+        The graph is only materialized from the adjacency matrix when it is requested.
+        '''
         if self.__network_graph_time != self.__time_svc.curr_time:
-            self.__update_network_graph()
+            adjacency = self.get_adjacency_matrix()
+            diff = self.get_topology_diff()
+            if diff is not None and self.__network_graph_time != -1 and diff.from_time == self.__network_graph_time:
+                diff.apply_to_graph(self.__network_graph, weight='latency')
+            else:
+                self.__network_graph = nx.from_scipy_sparse_array(adjacency, edge_attribute='latency')
+            self.__network_graph_time = self.__time_svc.curr_time
         return self.__network_graph
 
 
-    def __build_network_graph(self) -> nx.Graph:
-        all_nodes = self.__nodes_mgr.all_nodes
-        nodes_count = len(all_nodes.satellites) + len(all_nodes.edge_nodes) + len(all_nodes.cloud_nodes) + len(all_nodes.ground_stations)
-        graph = nx.Graph()
-        for i in range(nodes_count):
-            graph.add_node(i)
-        return graph
+    def get_topology_diff(self) -> TopologyDiff | None:
+        '''
+        Gets the diff from the previously loaded topology to the topology of the current time index.
+        The previously loaded topology is usually the one of the previous time index, unless time indices have been skipped.
+        Returns None if no topology has been loaded before the current one.
+        '''
+        self.get_adjacency_matrix()
+        if self.__prev_adjacency is None:
+            return None
+        if self.__topology_diff is None:
+            self.__topology_diff = TopologyDiff.compute(self.__prev_adjacency_time, self.__prev_adjacency, self.__adjacency_time, self.__adjacency)
+        return self.__topology_diff
+
+
+    def __on_task_completion(self, time: int):
+        self.__completion_times.discard(time)
+        self.release_finished_tasks()
+
 
+    def __get_window_distances(self, time: int, src_ids: list[int]) -> dict[int, np.ndarray]:
+        distances = self.__window_distances.setdefault(time, {})
+        missing = [ src_id for src_id in dict.fromkeys(src_ids) if src_id not in distances ]
+        if len(missing) > 0:
+            if time == self.__time_svc.curr_time:
+                adjacency = self.get_adjacency_matrix()
+            else:
+                adjacency = self.__topology.get_adjacency_matrix(time)
+            rows = csgraph.dijkstra(adjacency, directed=True, indices=missing)
+            for i, src_id in enumerate(missing):
+                distances[src_id] = rows[i]
+        return distances
 
-    def __update_network_graph(self):
-        delays = self.__sn.get_delay_matrix(self.__time_svc.curr_time)
-        nodes_count = self.__network_graph.number_of_nodes()
 
-        # We need to clear all edges, because the connections between nodes may change as the simulation progresses.
-        self.__network_graph.clear_edges()
+    def __update_sat_positions(self):
+        if self.__sat_positions_time != self.__time_svc.curr_time:
+            self.__sat_positions = self.__topology.get_positions(self.__time_svc.curr_time)
+            self.__sat_positions_time = self.__time_svc.curr_time
+
+
+    def __count_nodes(self) -> int:
+        all_nodes = self.__nodes_mgr.all_nodes
+        return len(all_nodes.satellites) + len(all_nodes.edge_nodes) + len(all_nodes.cloud_nodes) + len(all_nodes.ground_stations)
 
-        # We iterate through the top diagonal part of the delays_matrix to set the edge weights.
-        for i in range(nodes_count):
-            for j in range(i + 1, nodes_count):
-                latency = delays[i][j]
-                if latency != 0.0:
-                    self.__network_graph.add_edge(i, j, latency=latency)
 
-        self.__network_graph_time = self.__time_svc.curr_time
+    def __update_adjacency_matrix(self):
+        if self.__adjacency_time != -1:
+            self.__prev_adjacency = self.__adjacency
+            self.__prev_adjacency_time = self.__adjacency_time
+        self.__topology_diff = None
+        self.__adjacency = self.__topology.get_adjacency_matrix(self.__time_svc.curr_time)
+        self.__adjacency_time = self.__time_svc.curr_time
@@ -1,5 +1,9 @@
+import math
 from typing import Callable
 
+MSEC_PER_TIME_INDEX = 60 * 1000
+'''The simulated duration of a single time index in milliseconds. StarryNet is advanced minute by minute.'''
+
 SimulationAction = Callable[[int], None]
 '''
 An action to be called at a specific time index during the simulation.
@@ -9,6 +13,11 @@ The argument to the function is the time index.
 class StarryNetTimeService:
     '''Manages the internal clock of StarryNet.'''
 
+    @staticmethod
+    def to_time_indices(duration_msec: int) -> int:
+        '''Converts a duration in milliseconds to the number of time indices it spans (at least 1).'''
+        return max(1, math.ceil(duration_msec / MSEC_PER_TIME_INDEX))
+
     def __init__(self, sim_duration: int):
         self.__curr_time: int = 0
         self.__sim_duration = sim_duration
@@ -37,17 +46,36 @@ class StarryNetTimeService:
             return -1
 
 
+    def advance_to(self, time: int) -> int:
+        '''
+        Advances the current time to the specified time index, skipping all time indices in between, and returns the new value.
+        Once the simulation should end, the return value is -1.
+        '''
+        if time < self.__curr_time:
+            raise ValueError(f'Cannot move the clock backwards from {self.__curr_time} to {time}.')
+        self.__curr_time = time
+        if self.__curr_time <= self.__sim_duration:
+            return self.__curr_time
+        else:
+            return -1
+
+
     def run_simulation(self, actions: dict[int, SimulationAction]):
         '''
-        Runs the entire simulation form start to finish and calls the specified actions at the respective time indices.
+        Advances the clock from one action to the next and calls the specified actions at the respective time indices.
 
         Each key in the `actions` dict specifies a time index and the respective value is a function that is called at that time.
+        Time indices without an action are skipped, so the clock is left at the time index of the last action.
+        Once an action lies after the end of the simulation, the clock is advanced to it, but it and all later actions are not called.
+        Raises a ValueError if an action lies before the current time. For simulations with multiple events per time index, use the SimulationEngine.
         '''
-        curr_time = 0
-        while curr_time != -1:
-            print(f'Experiment clock at {curr_time}')
-            action = actions.get(curr_time)
-            if action:
-                action(curr_time)
-            curr_time = self.increment_clock()
+        past_times = [ time for time in actions.keys() if time < self.__curr_time ]
+        if len(past_times) > 0:
+            raise ValueError(f'Cannot run actions at time {min(past_times)}, because the current time is {self.__curr_time}.')
+
+        for time in sorted(actions.keys()):
+            if self.advance_to(time) == -1:
+                break
+            print(f'Experiment clock at {time}')
+            actions[time](time)
 
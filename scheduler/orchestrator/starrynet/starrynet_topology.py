@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING
+import numpy as np
+from scipy import sparse
+from scheduler.orchestrator import TopologyProvider, delay_matrix_to_adjacency_matrix
+
+if TYPE_CHECKING:
+    from starrynet.starrynet.sn_synchronizer import StarryNet
+
+
+class StarryNetTopology(TopologyProvider):
+    '''TopologyProvider that reads the delay matrices and satellite positions directly from StarryNet.'''
+
+    def __init__(self, sn: 'StarryNet', nodes_count: int):
+        self.__sn = sn
+        self.__nodes_count = nodes_count
+
+
+    @property
+    def nodes_count(self) -> int:
+        return self.__nodes_count
+
+
+    def get_adjacency_matrix(self, time: int) -> sparse.csr_matrix:
+        return delay_matrix_to_adjacency_matrix(self.__sn.get_delay_matrix(time), self.__nodes_count)
+
+
+    def get_positions(self, time: int) -> np.ndarray:
+        return np.array(self.__sn.get_positions(time), dtype=np.float64).reshape(-1, 3)
@@ -0,0 +1,191 @@
+import json
+import math
+from dataclasses import dataclass
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from scheduler.orchestrator import TopologyProvider, links_to_adjacency_matrix
+from scheduler.util import EARTH_RADIUS_KM, lat_long_to_unit_vectors
+from .starrynet_time_svc import MSEC_PER_TIME_INDEX
+
+EARTH_ROTATION_RAD_PER_SEC = 7.2921159e-5
+'''The angular velocity of the Earth's rotation.'''
+
+SIGNAL_SPEED_KM_PER_MSEC = 299792.458 / 1000.0
+'''The propagation speed of the signals on inter-satellite and ground-to-satellite links (speed of light in vacuum).'''
+
+
+@dataclass
+class WalkerConstellationConfig:
+    '''Configures a Walker delta constellation with circular orbits and the links of the ground nodes.'''
+
+    orbits_count: int
+    '''The number of orbital planes.'''
+
+    sats_per_orbit: int
+
+    phase_shift: int
+    '''The Walker phasing factor F: the mean anomaly of the satellites in plane p is shifted by p * F * 360° / (total satellites).'''
+
+    inclination_deg: float
+    altitude_km: float
+
+    period_sec: float
+    '''The orbital period of the satellites.'''
+
+    antennas_per_ground_node: int
+    '''The number of satellites, to which a ground node connects at most.'''
+
+    min_elevation_deg: float
+    '''The minimum elevation above the horizon, at which a ground node can connect to a satellite.'''
+
+    @property
+    def satellites_count(self) -> int:
+        return self.orbits_count * self.sats_per_orbit
+
+
+    @staticmethod
+    def from_starrynet_config(config_path: str, sats_per_orbit_override: int | None = None) -> 'WalkerConstellationConfig':
+        '''Reads the constellation from a StarryNet config.json file.'''
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        return WalkerConstellationConfig(
+            orbits_count=int(config['# of orbit']),
+            sats_per_orbit=sats_per_orbit_override if sats_per_orbit_override is not None else int(config['# of satellites']),
+            phase_shift=int(config['Phase shift']),
+            inclination_deg=float(config['Inclination']),
+            altitude_km=float(config['Altitude (km)']),
+            period_sec=float(config['Cycle (s)']),
+            antennas_per_ground_node=int(config['antenna number']),
+            min_elevation_deg=float(config['antenna_inclination_angle']),
+        )
+
+
+class WalkerConstellationTopology(TopologyProvider):
+    '''
+    Built-in TopologyProvider, which computes the topology of a Walker delta constellation without StarryNet.
+
+    The satellites move on circular orbits around a spherical Earth, so their positions are computed in closed form,
+    vectorized over all satellites and time indices. Since the orbits of a Walker shell are circular, a general propagator like SGP4 is not needed.
+    The satellite IDs are ordered by orbital plane and then by position in the plane.
+    The satellites are connected in a +Grid, i.e., each satellite has a link to its successor in the same plane
+    and to the satellite with the same index in the next plane. Each ground node is connected to the nearest satellites
+    that are above its minimum elevation. If no satellite is visible, the ground node has no link at that time index.
+    The latency of a link is its length divided by `SIGNAL_SPEED_KM_PER_MSEC`.
+    '''
+
+    def __init__(self, config: WalkerConstellationConfig, ground_locations_lat_long: list[tuple[float, float]], duration: int):
+        '''
+        `config`: the constellation.
+        `ground_locations_lat_long`: the locations of the ground nodes, whose IDs follow the satellite IDs in this order.
+        `duration`: the last time index of the simulation. The satellite positions of the time indices [0, duration] are precomputed.
+        '''
+        self.config = config
+        self.duration = duration
+        self.__nodes_count = config.satellites_count + len(ground_locations_lat_long)
+        self.__orbit_radius_km = EARTH_RADIUS_KM + config.altitude_km
+
+        ground_locations = np.array(ground_locations_lat_long, dtype=np.float64).reshape(-1, 2)
+        self.__ground_ecef = lat_long_to_unit_vectors(ground_locations[:, 0], ground_locations[:, 1]) * EARTH_RADIUS_KM
+
+        # All satellites have the same altitude, so the farthest visible satellite is the one at the minimum elevation.
+        min_elevation = math.radians(config.min_elevation_deg)
+        self.__max_ground_link_km = (
+            math.sqrt(self.__orbit_radius_km ** 2 - (EARTH_RADIUS_KM * math.cos(min_elevation)) ** 2) - EARTH_RADIUS_KM * math.sin(min_elevation)
+        )
+
+        self.__isl_rows, self.__isl_cols = self.__create_grid_links()
+        self.__sat_ecef = self.__propagate(np.arange(duration + 1))
+        '''The ECEF coordinates of all satellites with shape (time indices, satellites, 3).'''
+
+
+    @property
+    def nodes_count(self) -> int:
+        return self.__nodes_count
+
+
+    def get_adjacency_matrix(self, time: int) -> sparse.csr_matrix:
+        sat_ecef = self.__get_sat_ecef(time)
+        isl_latencies = np.linalg.norm(sat_ecef[self.__isl_rows] - sat_ecef[self.__isl_cols], axis=1) / SIGNAL_SPEED_KM_PER_MSEC
+        ground_rows, ground_cols, ground_latencies = self.__create_ground_links(sat_ecef)
+        return links_to_adjacency_matrix(
+            np.concatenate((self.__isl_rows, ground_rows)),
+            np.concatenate((self.__isl_cols, ground_cols)),
+            np.concatenate((isl_latencies, ground_latencies)),
+            self.__nodes_count,
+        )
+
+
+    def get_positions(self, time: int) -> np.ndarray:
+        sat_ecef = self.__get_sat_ecef(time)
+        positions = np.empty((len(sat_ecef), 3), dtype=np.float64)
+        positions[:, 0] = np.degrees(np.arcsin(sat_ecef[:, 2] / self.__orbit_radius_km))
+        positions[:, 1] = np.degrees(np.arctan2(sat_ecef[:, 1], sat_ecef[:, 0]))
+        positions[:, 2] = self.config.altitude_km
+        return positions
+
+
+    def __get_sat_ecef(self, time: int) -> np.ndarray:
+        if 0 <= time <= self.duration:
+            return self.__sat_ecef[time]
+        return self.__propagate(np.array([ time ]))[0]
+
+
+    def __propagate(self, times: np.ndarray) -> np.ndarray:
+        '''Computes the ECEF coordinates of all satellites at the time indices with shape (time indices, satellites, 3).'''
+        config = self.config
+        planes = np.repeat(np.arange(config.orbits_count), config.sats_per_orbit)
+        slots = np.tile(np.arange(config.sats_per_orbit), config.orbits_count)
+        inclination = math.radians(config.inclination_deg)
+
+        seconds = (times.astype(np.float64) * (MSEC_PER_TIME_INDEX / 1000.0))[:, np.newaxis]
+        # The longitude of the ascending node drifts westwards due to the rotation of the Earth.
+        ascending_node = 2.0 * math.pi * planes / config.orbits_count - EARTH_ROTATION_RAD_PER_SEC * seconds
+        arg_of_latitude = (
+            2.0 * math.pi * slots / config.sats_per_orbit
+            + 2.0 * math.pi * config.phase_shift * planes / config.satellites_count
+            + 2.0 * math.pi * seconds / config.period_sec
+        )
+
+        cos_node = np.cos(ascending_node)
+        sin_node = np.sin(ascending_node)
+        cos_arg = np.cos(arg_of_latitude)
+        sin_arg = np.sin(arg_of_latitude)
+        return self.__orbit_radius_km * np.stack(
+            (
+                cos_node * cos_arg - sin_node * sin_arg * math.cos(inclination),
+                sin_node * cos_arg + cos_node * sin_arg * math.cos(inclination),
+                sin_arg * math.sin(inclination),
+            ),
+            axis=-1,
+        )
+
+
+    def __create_grid_links(self) -> tuple[np.ndarray, np.ndarray]:
+        '''Creates the +Grid inter-satellite links. Each undirected link is contained once.'''
+        config = self.config
+        sat_ids = np.arange(config.satellites_count).reshape(config.orbits_count, config.sats_per_orbit)
+        intra_plane = np.roll(sat_ids, -1, axis=1)
+        inter_plane = np.roll(sat_ids, -1, axis=0)
+
+        rows = np.concatenate((sat_ids.ravel(), sat_ids.ravel()))
+        cols = np.concatenate((intra_plane.ravel(), inter_plane.ravel()))
+        # Small constellations (e.g., 1 or 2 satellites per plane) produce self-links and duplicate links.
+        links = np.unique(np.stack((np.minimum(rows, cols), np.maximum(rows, cols)), axis=1), axis=0)
+        links = links[links[:, 0] != links[:, 1]]
+        return links[:, 0], links[:, 1]
+
+
+    def __create_ground_links(self, sat_ecef: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Connects each ground node to its nearest visible satellites.'''
+        antennas = self.config.antennas_per_ground_node
+        if len(self.__ground_ecef) == 0 or antennas <= 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float64)
+
+        distances, sat_ids = cKDTree(sat_ecef).query(self.__ground_ecef, k=antennas, distance_upper_bound=self.__max_ground_link_km)
+        distances = np.asarray(distances).reshape(len(self.__ground_ecef), -1)
+        sat_ids = np.asarray(sat_ids).reshape(len(self.__ground_ecef), -1)
+        ground_ids = np.repeat(np.arange(len(self.__ground_ecef)) + self.config.satellites_count, distances.shape[1]).reshape(distances.shape)
+
+        visible = np.isfinite(distances)
+        return ground_ids[visible], sat_ids[visible], distances[visible] / SIGNAL_SPEED_KM_PER_MSEC
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+_DISTANCE_TOLERANCE = 1e-9
+'''The tolerance in ms used for comparing distances in `TopologyDiff.affects_distances()`.'''
+
+_AFFECTS_DISTANCES_CHUNK_SIZE = 256
+'''The number of changed links that `TopologyDiff.affects_distances()` checks at once.'''
+
+
+@dataclass
+class TopologyDiff:
+    '''
+    The changes of the network topology between two time indices.
+
+    Each undirected link is identified by its two node IDs (row < col) and contained once.
+    '''
+
+    from_time: int
+    to_time: int
+
+    added_rows: np.ndarray
+    added_cols: np.ndarray
+    added_latencies: np.ndarray
+    '''The latencies of the links that exist at to_time, but not at from_time.'''
+
+    removed_rows: np.ndarray
+    removed_cols: np.ndarray
+    removed_latencies: np.ndarray
+    '''The latencies (at from_time) of the links that exist at from_time, but not at to_time.'''
+
+    reweighted_rows: np.ndarray
+    reweighted_cols: np.ndarray
+    old_latencies: np.ndarray
+    '''The latencies at from_time of the links that exist at both time indices, but whose latency has changed.'''
+
+    new_latencies: np.ndarray
+    '''The latencies at to_time of the reweighted links.'''
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.added_rows) == 0 and len(self.removed_rows) == 0 and len(self.reweighted_rows) == 0
+
+
+    @property
+    def changed_links_count(self) -> int:
+        return len(self.added_rows) + len(self.removed_rows) + len(self.reweighted_rows)
+
+
+    @staticmethod
+    def compute(from_time: int, from_adjacency: sparse.csr_matrix, to_time: int, to_adjacency: sparse.csr_matrix) -> 'TopologyDiff':
+        '''Computes the diff between two symmetric adjacency matrices with the same shape.'''
+        if from_adjacency.shape != to_adjacency.shape:
+            raise ValueError(f'The adjacency matrices must have the same shape, but they have {from_adjacency.shape} and {to_adjacency.shape}.')
+        nodes_count = from_adjacency.shape[0]
+        old_keys, old_latencies = _upper_links(from_adjacency)
+        new_keys, new_latencies = _upper_links(to_adjacency)
+
+        _, old_common, new_common = np.intersect1d(old_keys, new_keys, assume_unique=True, return_indices=True)
+        removed = np.ones(len(old_keys), dtype=np.bool_)
+        removed[old_common] = False
+        added = np.ones(len(new_keys), dtype=np.bool_)
+        added[new_common] = False
+        reweighted = old_latencies[old_common] != new_latencies[new_common]
+        reweighted_keys = old_keys[old_common[reweighted]]
+
+        return TopologyDiff(
+            from_time=from_time,
+            to_time=to_time,
+            added_rows=new_keys[added] // nodes_count,
+            added_cols=new_keys[added] % nodes_count,
+            added_latencies=new_latencies[added],
+            removed_rows=old_keys[removed] // nodes_count,
+            removed_cols=old_keys[removed] % nodes_count,
+            removed_latencies=old_latencies[removed],
+            reweighted_rows=reweighted_keys // nodes_count,
+            reweighted_cols=reweighted_keys % nodes_count,
+            old_latencies=old_latencies[old_common[reweighted]],
+            new_latencies=new_latencies[new_common[reweighted]],
+        )
+
+
+    def apply_to_graph(self, graph: nx.Graph, weight: str = 'latency'):
+        '''Updates the graph of from_time in place, such that it represents the topology of to_time.'''
+        graph.remove_edges_from(zip(self.removed_rows.tolist(), self.removed_cols.tolist()))
+        graph.add_weighted_edges_from(zip(self.added_rows.tolist(), self.added_cols.tolist(), self.added_latencies.tolist()), weight=weight)
+        graph.add_weighted_edges_from(zip(self.reweighted_rows.tolist(), self.reweighted_cols.tolist(), self.new_latencies.tolist()), weight=weight)
+
+
+    def affects_distances(self, distances: np.ndarray) -> np.ndarray:
+        '''
+        Checks for each row of single-source shortest path distances (computed at from_time) whether it may differ at to_time.
+        Unreachable nodes must have a distance of `np.inf`.
+
+        A row is unaffected if no shortest path uses a link that has been removed or has become slower
+        and no link that has been added or has become faster provides a shorter path.
+        Distances that are within a small tolerance of these bounds are treated as affected.
+
+        `distances`: a matrix with one row of distances to all nodes per source node.
+        Returns a boolean array with one entry per row, which is true if the row may have changed.
+        '''
+        increased = self.new_latencies > self.old_latencies
+        slower_rows = np.concatenate((self.removed_rows, self.reweighted_rows[increased]))
+        slower_cols = np.concatenate((self.removed_cols, self.reweighted_cols[increased]))
+        slower_latencies = np.concatenate((self.removed_latencies, self.old_latencies[increased]))
+        faster_rows = np.concatenate((self.added_rows, self.reweighted_rows[~increased]))
+        faster_cols = np.concatenate((self.added_cols, self.reweighted_cols[~increased]))
+        faster_latencies = np.concatenate((self.added_latencies, self.new_latencies[~increased]))
+
+        affected = np.zeros(len(distances), dtype=np.bool_)
+        # The links are checked in chunks and only for the rows that have not been found to be affected yet,
+        # because usually most rows are affected by one of the first links.
+        for start in range(0, max(len(slower_rows), len(faster_rows)), _AFFECTS_DISTANCES_CHUNK_SIZE):
+            unaffected = np.flatnonzero(~affected)
+            if len(unaffected) == 0:
+                break
+            chunk = slice(start, start + _AFFECTS_DISTANCES_CHUNK_SIZE)
+            remaining = distances[unaffected]
+            chunk_affected = np.zeros(len(unaffected), dtype=np.bool_)
+            for rows, cols in ((slower_rows[chunk], slower_cols[chunk]), (slower_cols[chunk], slower_rows[chunk])):
+                src_distances = remaining[:, rows]
+                # A slower link only matters if it is on a shortest path, i.e., if it is tight.
+                chunk_affected |= (np.isfinite(src_distances) & (src_distances + slower_latencies[chunk] <= remaining[:, cols] + _DISTANCE_TOLERANCE)).any(axis=1)
+            for rows, cols in ((faster_rows[chunk], faster_cols[chunk]), (faster_cols[chunk], faster_rows[chunk])):
+                chunk_affected |= (remaining[:, rows] + faster_latencies[chunk] < remaining[:, cols] + _DISTANCE_TOLERANCE).any(axis=1)
+            affected[unaffected[chunk_affected]] = True
+        return affected
+
+
+def _upper_links(adjacency: sparse.csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+    '''Returns the sorted keys (row * nodes_count + col) and the latencies of the links in the upper triangle of the adjacency matrix.'''
+    upper = sparse.triu(adjacency, k=1, format='coo')
+    keys = upper.row.astype(np.int64) * adjacency.shape[0] + upper.col.astype(np.int64)
+    order = np.argsort(keys)
+    return keys[order], np.asarray(upper.data, dtype=np.float64)[order]
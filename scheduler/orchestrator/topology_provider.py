@@ -0,0 +1,61 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from scipy import sparse
+
+class TopologyProvider(ABC):
+    '''
+    Provides the network topology and the satellite positions of a simulation for each time index.
+
+    The node IDs used in the topology are the satellites first, followed by all terrestrial nodes.
+    '''
+
+    @property
+    @abstractmethod
+    def nodes_count(self) -> int:
+        '''The number of nodes in the topology.'''
+        pass
+
+
+    @abstractmethod
+    def get_adjacency_matrix(self, time: int) -> sparse.csr_matrix:
+        '''
+        Gets the symmetric adjacency matrix of the network topology at the specified time index.
+        Each stored value is the latency in ms of the link between the row node and the column node.
+        '''
+        pass
+
+
+    @abstractmethod
+    def get_positions(self, time: int) -> np.ndarray:
+        '''
+        Gets the positions of all satellites at the specified time index as an array of shape (satellites, 3),
+        where each row contains (lat, long, altitude_km).
+        '''
+        pass
+
+
+def links_to_adjacency_matrix(rows: np.ndarray, cols: np.ndarray, latencies: np.ndarray, nodes_count: int) -> sparse.csr_matrix:
+    '''
+    Creates a symmetric adjacency matrix from a list of undirected links.
+    Each link (rows[i], cols[i]) must only be contained once.
+    '''
+    latencies = np.asarray(latencies, dtype=np.float64)
+    return sparse.csr_matrix(
+        (np.concatenate((latencies, latencies)), (np.concatenate((rows, cols)), np.concatenate((cols, rows)))),
+        shape=(nodes_count, nodes_count),
+    )
+
+
+def delay_matrix_to_adjacency_matrix(delays: np.ndarray, nodes_count: int) -> sparse.csr_matrix:
+    '''
+    Creates a symmetric adjacency matrix from the first nodes_count rows and columns of a dense delay matrix,
+    where a value of 0 means that there is no link.
+    '''
+    delays = np.asarray(delays, dtype=np.float64)[:nodes_count, :nodes_count]
+
+    # We only use the top diagonal part of the delays matrix and mirror it to obtain a symmetric adjacency matrix.
+    rows, cols = np.nonzero(delays)
+    upper = rows < cols
+    rows = rows[upper]
+    cols = cols[upper]
+    return links_to_adjacency_matrix(rows, cols, delays[rows, cols], nodes_count)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Any
+import numpy as np
+from scipy import sparse
+from .topology_provider import TopologyProvider, links_to_adjacency_matrix
+
+TOPOLOGY_STORE_FORMAT_VERSION = 1
+'''Incremented whenever the on-disk format of the TopologyStore changes, which invalidates all existing stores.'''
+
+
+class TopologyStore(TopologyProvider):
+    '''
+    Read-only TopologyProvider backed by a directory with precomputed topologies for all time indices of a simulation.
+
+    The links of each time index are stored once (upper triangle only) with float32 latencies,
+    the satellite positions are stored as float64. All arrays are memory-mapped, so opening a store is fast
+    and multiple processes that open the same store share the pages in the OS page cache.
+
+    A store is created once using `TopologyStore.write()`.
+    '''
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['version'] != TOPOLOGY_STORE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported topology store version {meta["version"]} in {path}')
+
+        self.path = path
+        '''The directory of the store.'''
+
+        self.satellites_count: int = meta['satellites_count']
+        '''The number of satellites in the topology.'''
+
+        self.duration: int = meta['duration']
+        '''The last time index stored in the topology.'''
+
+        self.__nodes_count: int = meta['nodes_count']
+        self.__offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r')
+        '''The links of time index t are stored at [offsets[t], offsets[t + 1]) in the rows, cols, and latencies arrays.'''
+
+        self.__rows = np.load(os.path.join(path, 'rows.npy'), mmap_mode='r')
+        self.__cols = np.load(os.path.join(path, 'cols.npy'), mmap_mode='r')
+        self.__latencies = np.load(os.path.join(path, 'latencies.npy'), mmap_mode='r')
+        self.__positions = np.load(os.path.join(path, 'positions.npy'), mmap_mode='r')
+
+
+    @property
+    def nodes_count(self) -> int:
+        return self.__nodes_count
+
+
+    def get_adjacency_matrix(self, time: int) -> sparse.csr_matrix:
+        self.__check_time(time)
+        start = int(self.__offsets[time])
+        end = int(self.__offsets[time + 1])
+        return links_to_adjacency_matrix(self.__rows[start:end], self.__cols[start:end], self.__latencies[start:end], self.__nodes_count)
+
+
+    def get_positions(self, time: int) -> np.ndarray:
+        self.__check_time(time)
+        return np.asarray(self.__positions[time])
+
+
+    @staticmethod
+    def compute_key(**inputs: Any) -> str:
+        '''
+        Computes a key that identifies a store from all inputs that influence the topology, e.g., the StarryNet configuration and the node locations.
+        The inputs must be JSON serializable.
+        '''
+        inputs = { 'version': TOPOLOGY_STORE_FORMAT_VERSION, **inputs }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+    @staticmethod
+    def write(path: str, provider: TopologyProvider, satellites_count: int, duration: int) -> 'TopologyStore':
+        '''
+        Precomputes the topologies of the time indices [0, duration] using the provider and stores them at the path.
+        The store is written to a temporary directory first and then moved to the path,
+        so that concurrent processes never see an incomplete store. If another process has created the store in the meantime, that one is used.
+        '''
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        os.makedirs(tmp_path, exist_ok=True)
+
+        offsets = np.zeros(duration + 2, dtype=np.int64)
+        rows: list[np.ndarray] = []
+        cols: list[np.ndarray] = []
+        latencies: list[np.ndarray] = []
+        positions = np.zeros((duration + 1, satellites_count, 3), dtype=np.float64)
+        for time in range(duration + 1):
+            upper = sparse.triu(provider.get_adjacency_matrix(time), k=1, format='coo')
+            rows.append(upper.row.astype(np.int32))
+            cols.append(upper.col.astype(np.int32))
+            latencies.append(upper.data.astype(np.float32))
+            offsets[time + 1] = offsets[time] + upper.nnz
+            positions[time] = provider.get_positions(time)
+
+        np.save(os.path.join(tmp_path, 'offsets.npy'), offsets)
+        np.save(os.path.join(tmp_path, 'rows.npy'), np.concatenate(rows))
+        np.save(os.path.join(tmp_path, 'cols.npy'), np.concatenate(cols))
+        np.save(os.path.join(tmp_path, 'latencies.npy'), np.concatenate(latencies))
+        np.save(os.path.join(tmp_path, 'positions.npy'), positions)
+        meta = {
+            'version': TOPOLOGY_STORE_FORMAT_VERSION,
+            'nodes_count': provider.nodes_count,
+            'satellites_count': satellites_count,
+            'duration': duration,
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            if not TopologyStore.exists(path):
+                raise
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return TopologyStore(path)
+
+
+    def __check_time(self, time: int):
+        if time < 0 or time > self.duration:
+            raise ValueError(f'Time index {time} is outside of the stored range [0, {self.duration}].')
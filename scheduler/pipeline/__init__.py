@@ -1 +1,2 @@
 from .pipeline import *
+from .filter_cache import *
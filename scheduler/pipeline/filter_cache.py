@@ -0,0 +1,78 @@
+from typing import Hashable, Sequence
+import numpy as np
+from scheduler.model import Node, NodeTable, Task
+from .pipeline import FilterPlugin, SchedulingContext
+
+FILTER_CACHE_MAX_ENTRIES = 64
+'''The maximum number of (filter plugin, task equivalence key) entries in a FilterResultsCache. The oldest entry is evicted first.'''
+
+
+class _FilterCacheEntry:
+
+    def __init__(self, table: NodeTable):
+        self.table = table
+        '''The table, whose rows the results are indexed by.'''
+
+        self.results = np.zeros(len(table), dtype=np.bool_)
+        '''The filter result for each node ID.'''
+
+        self.versions = np.full(len(table), -1, dtype=np.int64)
+        '''The row version, from which each result was computed. A result is valid if this matches the current row version.'''
+
+
+class FilterResultsCache:
+    '''
+    Caches the per-node results of cacheable filter plugins (see `FilterPlugin.cacheable`) for each task equivalence class.
+
+    Tasks with the same `Task.equivalence_key()` get the same results from a cacheable filter plugin, so when multiple identical tasks
+    are scheduled, e.g., the same function of multiple workflow instances, the plugin only needs to be rerun for the nodes
+    that have been modified in the meantime, e.g., because a task was assigned to them.
+    Modified nodes are detected using `NodeTable.row_versions`.
+    '''
+
+    def __init__(self, max_entries: int = FILTER_CACHE_MAX_ENTRIES):
+        self.__max_entries = max_entries
+        self.__entries: dict[tuple[int, Hashable], _FilterCacheEntry] = {}
+        '''The cache entries keyed by the ID of the filter plugin and the task equivalence key, in insertion order.'''
+
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+    def filter_batch(self, filter: FilterPlugin, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        '''Returns the result of `filter.filter_batch()` for the nodes, running the plugin only for nodes without a valid cached result.'''
+        located = NodeTable.locate(nodes)
+        if located is None:
+            return filter.filter_batch(nodes, task, ctx)
+        table, node_ids = located
+
+        entry = self.__get_entry(filter, task, table)
+        row_versions = table.row_versions[node_ids]
+        stale = entry.versions[node_ids] != row_versions
+        if stale.all():
+            entry.results[node_ids] = filter.filter_batch(nodes, task, ctx)
+            entry.versions[node_ids] = row_versions
+        elif stale.any():
+            stale_ids = node_ids[stale]
+            stale_nodes = [ table.nodes[node_id] for node_id in stale_ids.tolist() ]
+            entry.results[stale_ids] = filter.filter_batch(stale_nodes, task, ctx)
+            entry.versions[stale_ids] = row_versions[stale]
+        return entry.results[node_ids]
+
+
+    def clear(self):
+        self.__entries.clear()
+
+
+    def __get_entry(self, filter: FilterPlugin, task: Task, table: NodeTable) -> _FilterCacheEntry:
+        key = (id(filter), task.equivalence_key())
+        entry = self.__entries.get(key)
+        if entry is not None and entry.table is table and len(entry.results) == len(table):
+            return entry
+
+        if entry is None and len(self.__entries) >= self.__max_entries:
+            del self.__entries[next(iter(self.__entries))]
+        entry = _FilterCacheEntry(table)
+        self.__entries[key] = entry
+        return entry
@@ -1,12 +1,58 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence, cast
+import numpy as np
 from scheduler.model import AvailableNodes, Node, EligibleNode, Task, Workflow
 from scheduler.orchestrator import OrchestratorClient
 
+class StateKey[T]:
+    '''
+    Typed key for a value in the CycleState.
+    Keys are compared by identity, so each key should be created once, e.g., as a module-level constant.
+    '''
+
+    def __init__(self, name: str):
+        self.name = name
+        '''The name of the key, used for debugging.'''
+
+    def __repr__(self) -> str:
+        return f'StateKey({self.name})'
+
+
+class CycleState:
+    '''
+    Key/value storage that lives for a single scheduling cycle, i.e., for scheduling a single task.
+    Plugins can use it to share data between the pipeline stages instead of computing it multiple times.
+    '''
+
+    def __init__(self):
+        self.__values: dict[StateKey[Any], Any] = {}
+
+    def __contains__(self, key: StateKey[Any]) -> bool:
+        return key in self.__values
+
+    def get[T](self, key: StateKey[T]) -> T | None:
+        '''Gets the value stored under the key or None if there is no such value.'''
+        return cast(T | None, self.__values.get(key))
+
+    def set[T](self, key: StateKey[T], value: T):
+        self.__values[key] = value
+
+    def get_or_compute[T](self, key: StateKey[T], compute: Callable[[], T]) -> T:
+        '''Gets the value stored under the key. If there is no such value, it is computed and stored first.'''
+        if key in self.__values:
+            return cast(T, self.__values[key])
+        value = compute()
+        self.__values[key] = value
+        return value
+
+
 @dataclass
 class SchedulingContext:
     workflow: Workflow
     orchestrator: OrchestratorClient
+    cycle_state: CycleState = field(default_factory=CycleState)
+    '''State that is shared by all plugins during the current scheduling cycle.'''
 
 
 class SelectCandidateNodesPlugin(ABC):
@@ -27,6 +73,25 @@ class SelectCandidateNodesPlugin(ABC):
 class FilterPlugin(ABC):
     '''Plugin to filter out non-eligible nodes for hosting a task.'''
 
+    def pre_filter(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext):
+        '''
+        Optional method that is called once per scheduling cycle before any filter plugin is run.
+        It receives all nodes that will be passed to the first filter plugin and can be used to
+        compute per-task data and store it in `ctx.cycle_state`.
+        '''
+        pass
+
+
+    @property
+    def cacheable(self) -> bool:
+        '''
+        True if the result of this plugin for a node only depends on `Task.equivalence_key()` and on the row of the node in its NodeTable.
+        The scheduler caches the results of cacheable plugins across tasks with the same equivalence key
+        and only reruns the plugin for nodes whose rows have changed since.
+        '''
+        return False
+
+
     @abstractmethod
     def filter(self, node: Node, task: Task, ctx: SchedulingContext) -> bool:
         '''
@@ -35,6 +100,16 @@ class FilterPlugin(ABC):
         pass
 
 
+    def filter_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Returns a boolean mask with one entry per node, which is true if the respective node can host the task.
+
+        The scheduler always calls this method. The default implementation calls filter() for every node,
+        plugins can override it with a vectorized implementation.
+        '''
+        return np.fromiter((self.filter(node, task, ctx) for node in nodes), dtype=np.bool_, count=len(nodes))
+
+
 class ScorePlugin(ABC):
     '''
     Plugin to determine how well suited an eligible node is for a task by assigning a score.
@@ -53,18 +128,60 @@ class ScorePlugin(ABC):
         pass
 
 
+    def pre_score(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext):
+        '''
+        Optional method that is called once per scheduling cycle before any score plugin is run.
+        It receives all eligible nodes and can be used to compute per-task data and store it in `ctx.cycle_state`.
+        '''
+        pass
+
+
     def normalize_scores(self, task: Task, node_scores: list[EligibleNode], ctx: SchedulingContext):
         '''Optional method that normalizes the node scores (in place) to the range [0, 100].'''
         pass
 
 
+    def score_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Returns an integer array with the score of each node.
+
+        The scheduler always calls this method. The default implementation calls score() for every node,
+        plugins can override it with a vectorized implementation.
+        '''
+        return np.fromiter((self.score(node, task, ctx) for node in nodes), dtype=np.int64, count=len(nodes))
+
+
+    def normalize_scores_batch(self, task: Task, nodes: Sequence[Node], scores: np.ndarray, ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Normalizes the scores returned by score_batch() to the range [0, 100] and returns the normalized scores.
+
+        The scheduler always calls this method. The default implementation delegates to normalize_scores(), if a plugin implements it,
+        plugins can override it with a vectorized implementation.
+        '''
+        if type(self).normalize_scores is ScorePlugin.normalize_scores:
+            return scores
+
+        node_scores = [ EligibleNode(node, score) for node, score in zip(nodes, scores.tolist()) ]
+        self.normalize_scores(task, node_scores, ctx)
+        return np.fromiter((node_score.score for node_score in node_scores), dtype=np.int64, count=len(node_scores))
+
+
 class CommitPlugin(ABC):
     '''
     Plugin to assign the task to the most suitable node in the orchestrator.
     '''
 
+    @property
+    def ranked_nodes_count(self) -> int | None:
+        '''
+        The number of top-ranked nodes that commit() is expected to look at or None if it may look at all nodes.
+        The scheduler only ranks this many nodes upfront, further nodes are ranked lazily when they are accessed.
+        '''
+        return None
+
+
     @abstractmethod
-    def commit(self, task: Task, scored_nodes: list[EligibleNode], ctx: SchedulingContext) -> EligibleNode | None:
+    def commit(self, task: Task, scored_nodes: Sequence[EligibleNode], ctx: SchedulingContext) -> EligibleNode | None:
         '''
         Assigns the task to the most suitable node in the orchestrator. If this is not possible, another node
         may be selected from the list of scored_nodes, which is sorted from highest to lowest score.
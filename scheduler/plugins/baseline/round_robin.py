@@ -1,3 +1,5 @@
+from typing import Sequence
+import numpy as np
 from scheduler.model import EligibleNode, Node, Task
 from scheduler.pipeline import SchedulingContext, ScorePlugin
 
@@ -13,6 +15,33 @@ class RoundRobinPlugin(ScorePlugin):
         return 0
 
 
+    def score_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        return np.zeros(len(nodes), dtype=np.int64)
+
+
+    def normalize_scores_batch(self, task: Task, nodes: Sequence[Node], scores: np.ndarray, ctx: SchedulingContext) -> np.ndarray:
+        '''Vectorized version of normalize_scores(), which works on the node IDs.'''
+        if len(nodes) == 0:
+            raise SystemError('The list of node_scores was empty.')
+        next_id = self.__last_node_id + 1
+        if next_id == self.__total_nodes:
+            next_id = 0
+
+        node_ids = np.fromiter((node.node_id for node in nodes), dtype=np.int64, count=len(nodes))
+        candidates = node_ids >= next_id
+        if candidates.any():
+            # The lowest ID that is greater or equal to next_id.
+            index = int(np.argmin(np.where(candidates, node_ids, self.__total_nodes)))
+        else:
+            # We need to wrap the ID counter around to 0 (actually to the lowest ID that we could find).
+            index = int(np.argmin(node_ids))
+
+        scores = scores.copy()
+        scores[index] = 100
+        self.__last_node_id = int(node_ids[index])
+        return scores
+
+
     def normalize_scores(self, task: Task, node_scores: list[EligibleNode], ctx: SchedulingContext):
         next_id = self.__last_node_id + 1
         if next_id == self.__total_nodes:
@@ -23,7 +52,7 @@ class RoundRobinPlugin(ScorePlugin):
         lowest_id = self.__total_nodes
         lowest_id_node: EligibleNode | None = None
         for scored_node in node_scores:
-            node_id = int(scored_node.node.name)
+            node_id = scored_node.node.node_id
             if node_id >= next_id and node_id < lowest_id_greater_equal_next:
                 lowest_id_greater_equal_next = node_id
                 lowest_node_greater_equal_next = scored_node
@@ -1,5 +1,7 @@
 import math
-from scheduler.model import Node, SatelliteNode, Task
+from typing import Sequence
+import numpy as np
+from scheduler.model import Node, NodeKind, NodeTable, SatelliteNode, Task
 from scheduler.pipeline import SchedulingContext, ScorePlugin
 from scheduler.util import HeatEstimator
 
@@ -24,6 +26,26 @@ class HeatOptPlugin(ScorePlugin):
         )
 
 
+    def score_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        located = NodeTable.locate(nodes)
+        if located is None:
+            return super().score_batch(nodes, task, ctx)
+        table, node_ids = located
+
+        scores = np.full(len(nodes), 100, dtype=np.int64)
+        sat_indices = np.flatnonzero(table.kind[node_ids] == NodeKind.SATELLITE.value)
+        if len(sat_indices) == 0:
+            return scores
+
+        sat_ids = node_ids[sat_indices]
+        scores[sat_indices] = self.__compute_scores(
+            expected_temps=self.__heat_estimator.estimate_max_temps(table, sat_ids, task),
+            recommended_temps=table.recommended_high_temp_C[sat_ids],
+            max_temps=table.max_temp_C[sat_ids],
+        )
+        return scores
+
+
     def __compute_score(self, expected_temp: float, recommended_temp: float, max_temp: float) -> int:
         if expected_temp <= recommended_temp:
             return 100
@@ -34,3 +56,14 @@ class HeatOptPlugin(ScorePlugin):
         over_recommended = expected_temp - recommended_temp
         inv_percentage_over = 1 - over_recommended / range
         return int(math.floor(inv_percentage_over * 100))
+
+
+    def __compute_scores(self, expected_temps: np.ndarray, recommended_temps: np.ndarray, max_temps: np.ndarray) -> np.ndarray:
+        '''Vectorized version of __compute_score().'''
+        # Where the range is 0, expected_temp <= recommended_temp or expected_temp > max_temp is true, so the division result is discarded.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_percentage_over = 1 - (expected_temps - recommended_temps) / (max_temps - recommended_temps)
+        scores = np.floor(inv_percentage_over * 100)
+        scores = np.where(expected_temps > max_temps, 0, scores)
+        scores = np.where(expected_temps <= recommended_temps, 100, scores)
+        return scores.astype(np.int64)
@@ -1,3 +1,4 @@
+from typing import Sequence
 from scheduler.model import EligibleNode, Task
 from scheduler.pipeline import CommitPlugin, SchedulingContext
 
@@ -5,7 +6,12 @@ NODES_TO_TRY = 3
 
 class MultiCommitPlugin(CommitPlugin):
 
-    def commit(self, task: Task, scored_nodes: list[EligibleNode], ctx: SchedulingContext) -> EligibleNode | None:
+    @property
+    def ranked_nodes_count(self) -> int | None:
+        return NODES_TO_TRY
+
+
+    def commit(self, task: Task, scored_nodes: Sequence[EligibleNode], ctx: SchedulingContext) -> EligibleNode | None:
         nodes_tried = 0
         for node in scored_nodes:
             if nodes_tried == NODES_TO_TRY:
@@ -1,10 +1,174 @@
 import math
-from scheduler.model import Node, EligibleNode, Task
-from scheduler.pipeline import FilterPlugin, SchedulingContext, ScorePlugin
+from dataclasses import dataclass
+from enum import Enum
+from typing import Sequence
+import numpy as np
+from scheduler.model import Node, EligibleNode, NetworkSLO, NodeTable, Task
+from scheduler.pipeline import FilterPlugin, SchedulingContext, ScorePlugin, StateKey
+
+class SloWindowMode(Enum):
+    '''Determines which latencies the NetworkQosPlugin evaluates the network SLOs on.'''
+
+    CURRENT = 'current'
+    '''Only the latencies at the current time index are evaluated.'''
+
+    WORST_CASE = 'worst-case'
+    '''
+    The highest latency over the expected execution time of the task is evaluated.
+    A node that cannot be reached at any time index of this window is treated as unreachable.
+    '''
+
+    PERCENTILE = 'percentile'
+    '''
+    A percentile of the latencies over the expected execution time of the task is evaluated.
+    Time indices at which a node cannot be reached count as an infinite latency.
+    '''
+
+
+@dataclass(frozen=True)
+class _LatencyWindow:
+    '''The time window, over which the NetworkQosPlugin aggregates the latencies predicted by the orchestrator.'''
+
+    duration_msec: int
+    mode: SloWindowMode
+    percentile: float
+
+    def aggregate(self, latencies: np.ndarray) -> np.ndarray:
+        '''
+        Aggregates latencies with the shape (srcs, time indices, dests) over the time indices.
+        Unreachable nodes are -1 in both the input and the result.
+        '''
+        latencies = np.where(latencies == -1, np.inf, latencies)
+        if self.mode == SloWindowMode.WORST_CASE:
+            aggregated = latencies.max(axis=1)
+        else:
+            # 'higher' picks an actual sample instead of interpolating, so infinite latencies do not produce NaN.
+            aggregated = np.percentile(latencies, self.percentile, axis=1, method='higher')
+        aggregated[aggregated == np.inf] = -1
+        return aggregated
+
+
+class _IncomingSloLatencies:
+    '''
+    The incoming SLOs of the task that is being scheduled and the latencies from their source nodes,
+    which are shared between the filter and the score stage of a scheduling cycle.
+    '''
+
+    def __init__(self, slos: list[tuple[NetworkSLO, Node]], window: _LatencyWindow | None):
+        self.slos = slos
+        '''The result of `Workflow.all_incoming_slos()` for the task.'''
+
+        self.window = window
+        '''The window, over which the latencies are aggregated, or None if only the current latencies are used.'''
+
+        self.__latencies: dict[Node, tuple[NodeTable, np.ndarray]] = {}
+        '''Maps a source node to the latencies to all nodes of a NodeTable, indexed by node ID. Unknown latencies are NaN.'''
+
+
+    def get_latencies(self, src_node: Node, nodes: Sequence[Node], ctx: SchedulingContext) -> np.ndarray:
+        '''Gets the latencies from src_node to the nodes. Only latencies that have not been queried before in this cycle are requested from the orchestrator.'''
+        located = NodeTable.locate(nodes)
+        if located is None:
+            if self.window is not None:
+                return self.window.aggregate(ctx.orchestrator.get_latencies_over_time([ src_node ], nodes, self.window.duration_msec))[0]
+            return ctx.orchestrator.get_latencies(src_node, nodes)
+
+        table, node_ids = located
+        cached = self.__get_cached_latencies(src_node, table)
+        latencies = cached[node_ids]
+        missing = np.isnan(latencies)
+        if missing.any():
+            missing_ids = node_ids[missing]
+            missing_nodes = [ table.nodes[node_id] for node_id in missing_ids.tolist() ]
+            if self.window is not None:
+                latencies[missing] = self.__query_window(src_node, table, missing_ids, missing_nodes, ctx)
+            else:
+                latencies[missing] = ctx.orchestrator.get_latencies(src_node, missing_nodes)
+            cached[missing_ids] = latencies[missing]
+        return latencies
+
+
+    def get_latencies_within(self, src_node: Node, nodes: Sequence[Node], max_latency_msec: float, ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Gets the latencies from src_node to the nodes, if they are at most max_latency_msec, otherwise `np.inf`.
+        The orchestrator only needs to search paths up to max_latency_msec. Only the latencies within this limit are cached,
+        which suffices for the score stage, because all other nodes are filtered out.
+        '''
+        located = NodeTable.locate(nodes)
+        if located is None:
+            return ctx.orchestrator.get_latencies_within(src_node, nodes, max_latency_msec)
+
+        table, node_ids = located
+        cached = self.__get_cached_latencies(src_node, table)
+        latencies = cached[node_ids]
+        missing = np.isnan(latencies)
+        if missing.any():
+            missing_ids = node_ids[missing]
+            missing_latencies = ctx.orchestrator.get_latencies_within(src_node, [ table.nodes[node_id] for node_id in missing_ids.tolist() ], max_latency_msec)
+            latencies[missing] = missing_latencies
+            within = missing_latencies != np.inf
+            cached[missing_ids[within]] = missing_latencies[within]
+
+        latencies[(latencies == -1) | (latencies > max_latency_msec)] = np.inf
+        return latencies
+
+
+    def __query_window(self, src_node: Node, table: NodeTable, node_ids: np.ndarray, nodes: list[Node], ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Queries the aggregated latencies from src_node and all other SLO source nodes to the nodes in a single request,
+        such that the orchestrator can search the paths of all sources together for each time index of the window.
+        The latencies of the other source nodes are cached.
+        '''
+        assert self.window is not None
+        srcs = list(dict.fromkeys([ src_node ] + [ src for _, src in self.slos ]))
+        latencies = self.window.aggregate(ctx.orchestrator.get_latencies_over_time(srcs, nodes, self.window.duration_msec))
+        for src, src_latencies in zip(srcs[1:], latencies[1:]):
+            self.__get_cached_latencies(src, table)[node_ids] = src_latencies
+        return latencies[0]
+
+
+    def __get_cached_latencies(self, src_node: Node, table: NodeTable) -> np.ndarray:
+        cached = self.__latencies.get(src_node)
+        if cached is None or cached[0] is not table or len(cached[1]) != len(table):
+            cached = (table, np.full(len(table), np.nan, dtype=np.float64))
+            self.__latencies[src_node] = cached
+        return cached[1]
+
+
+_INCOMING_SLO_LATENCIES = StateKey[dict[_LatencyWindow | None, _IncomingSloLatencies]]('NetworkQosPlugin.incoming_slo_latencies')
+'''The incoming SLO latencies of the current cycle for each latency window (None for the current latencies).'''
+
 
 class NetworkQosPlugin(FilterPlugin, ScorePlugin):
+    '''
+    Filters out the nodes that violate the maximum latency of a network SLO of the task and prefers the nodes with lower latencies.
+
+    By default, the latencies at the current time index are evaluated. Since the topology of a satellite network changes while the task is running,
+    `SloWindowMode.WORST_CASE` and `SloWindowMode.PERCENTILE` evaluate the latencies predicted by the orchestrator over the expected execution time of the task instead.
+    The window spans the longest expected execution time of all CPU architectures of the task. If the task has no expected execution time, the current latencies are used.
+    '''
+
+    def __init__(
+        self,
+        window_mode: SloWindowMode = SloWindowMode.CURRENT,
+        window_percentile: float = 95.0,
+        max_window_msec: int | None = None,
+    ):
+        '''
+        `window_mode`: determines how the latencies over the expected execution time of the task are evaluated.
+        `window_percentile`: the percentile in [0; 100] used by `SloWindowMode.PERCENTILE`.
+        `max_window_msec`: limits the duration of the window. None means that the window is not limited.
+        '''
+        if not 0.0 <= window_percentile <= 100.0:
+            raise ValueError(f'window_percentile must be in [0; 100], but is {window_percentile}.')
+        self.__window_mode = window_mode
+        self.__window_percentile = window_percentile
+        self.__max_window_msec = max_window_msec
+
 
     def filter(self, node: Node, task: Task, ctx: SchedulingContext) -> bool:
+        if self.__get_window(task) is not None:
+            return bool(self.filter_batch([ node ], task, ctx)[0])
         for slo, src_node in ctx.workflow.all_incoming_slos(task):
             if slo.max_latency_msec is not None:
                 latency = ctx.orchestrator.get_latency(src_node, node)
@@ -14,6 +178,8 @@ class NetworkQosPlugin(FilterPlugin, ScorePlugin):
 
 
     def score(self, node: Node, task: Task, ctx: SchedulingContext) -> int:
+        if self.__get_window(task) is not None:
+            return int(self.score_batch([ node ], task, ctx)[0])
         highest_latency = 0.0
         for slo, src_node in ctx.workflow.all_incoming_slos(task):
             latency = ctx.orchestrator.get_latency(src_node, node)
@@ -21,6 +187,43 @@ class NetworkQosPlugin(FilterPlugin, ScorePlugin):
         return int(round(highest_latency, 0))
 
 
+    def pre_filter(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext):
+        self.__get_slo_latencies(task, ctx)
+
+
+    def pre_score(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext):
+        self.__get_slo_latencies(task, ctx)
+
+
+    def filter_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        '''
+        Issues one latency query per SLO source for all nodes, which only searches paths up to the SLO's maximum latency.
+        If the latencies are evaluated over a window, a single query for all SLO sources computes the complete latencies instead.
+        The latencies are kept for the score stage.
+        '''
+        slo_latencies = self.__get_slo_latencies(task, ctx)
+        mask = np.ones(len(nodes), dtype=np.bool_)
+        for slo, src_node in slo_latencies.slos:
+            if slo.max_latency_msec is not None:
+                if slo_latencies.window is None:
+                    latencies = slo_latencies.get_latencies_within(src_node, nodes, slo.max_latency_msec, ctx)
+                    mask &= latencies <= slo.max_latency_msec
+                else:
+                    latencies = slo_latencies.get_latencies(src_node, nodes, ctx)
+                    mask &= (latencies != -1) & (latencies <= slo.max_latency_msec)
+        return mask
+
+
+    def score_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        '''Reuses the latencies from the filter stage and only queries the missing ones.'''
+        slo_latencies = self.__get_slo_latencies(task, ctx)
+        highest_latencies = np.zeros(len(nodes), dtype=np.float64)
+        for slo, src_node in slo_latencies.slos:
+            latencies = slo_latencies.get_latencies(src_node, nodes, ctx)
+            np.maximum(highest_latencies, latencies, out=highest_latencies)
+        return np.round(highest_latencies).astype(np.int64)
+
+
     def normalize_scores(self, task: Task, node_scores: list[EligibleNode], ctx: SchedulingContext):
         '''
         Normalizes the scores to the range [0; 100] using the following procedure:
@@ -44,3 +247,35 @@ class NetworkQosPlugin(FilterPlugin, ScorePlugin):
             percentage = float(diff) / max_diff
             score = math.floor(percentage * 100)
             node_score.score = score
+
+
+    def normalize_scores_batch(self, task: Task, nodes: Sequence[Node], scores: np.ndarray, ctx: SchedulingContext) -> np.ndarray:
+        '''Vectorized version of normalize_scores().'''
+        lowest_latency = min(1000000000, int(scores.min(initial=1000000000)))
+        highest_latency = max(0, int(scores.max(initial=0)))
+
+        max_diff = float(highest_latency - lowest_latency)
+        if max_diff == 0.0:
+            max_diff = 1.0
+
+        percentages = (highest_latency - scores) / max_diff
+        return np.floor(percentages * 100).astype(np.int64)
+
+
+    def __get_slo_latencies(self, task: Task, ctx: SchedulingContext) -> _IncomingSloLatencies:
+        all_slo_latencies = ctx.cycle_state.get_or_compute(_INCOMING_SLO_LATENCIES, dict)
+        window = self.__get_window(task)
+        slo_latencies = all_slo_latencies.get(window)
+        if slo_latencies is None:
+            slo_latencies = _IncomingSloLatencies(list(ctx.workflow.all_incoming_slos(task)), window)
+            all_slo_latencies[window] = slo_latencies
+        return slo_latencies
+
+
+    def __get_window(self, task: Task) -> _LatencyWindow | None:
+        if self.__window_mode == SloWindowMode.CURRENT or len(task.expected_exec_time_msec) == 0:
+            return None
+        duration_msec = max(task.expected_exec_time_msec.values())
+        if self.__max_window_msec is not None:
+            duration_msec = min(duration_msec, self.__max_window_msec)
+        return _LatencyWindow(duration_msec, self.__window_mode, self.__window_percentile)
@@ -1,9 +1,16 @@
-from scheduler.model import Node, Task
+from typing import Sequence
+import numpy as np
+from scheduler.model import CPU_ARCH_CODES, RESOURCE_INDEX, Node, NodeTable, Task
 from scheduler.pipeline import FilterPlugin, SchedulingContext
 
 
 class ResourcesFitPlugin(FilterPlugin):
 
+    @property
+    def cacheable(self) -> bool:
+        return True
+
+
     def filter(self, node: Node, task: Task, ctx: SchedulingContext) -> bool:
         if task.cpu_architectures and task.cpu_architectures.count(node.cpu_arch) == 0:
             return False
@@ -13,3 +20,20 @@ class ResourcesFitPlugin(FilterPlugin):
             if available_qty is None or available_qty < req_qty:
                 return False
         return True
+
+
+    def filter_batch(self, nodes: Sequence[Node], task: Task, ctx: SchedulingContext) -> np.ndarray:
+        located = NodeTable.locate(nodes)
+        if located is None:
+            return super().filter_batch(nodes, task, ctx)
+        table, node_ids = located
+
+        mask = np.ones(len(nodes), dtype=np.bool_)
+        if task.cpu_architectures:
+            cpu_arch_codes = [ CPU_ARCH_CODES[arch] for arch in task.cpu_architectures ]
+            mask &= np.isin(table.cpu_arch[node_ids], cpu_arch_codes)
+
+        for key, req_qty in task.req_resources.items():
+            res_index = RESOURCE_INDEX[key]
+            mask &= table.has_resource[node_ids, res_index] & (table.free[node_ids, res_index] >= req_qty)
+        return mask
@@ -1,14 +1,46 @@
+from enum import Enum
 from typing import cast
 from random import Random
-from scheduler.model import AvailableNodes, Location, Node, SatelliteNode, Task, TerrestrialNode
+import numpy as np
+from scheduler.model import AvailableNodes, Location, Node, NodeTable, SatelliteNode, Task, TerrestrialNode
 from scheduler.pipeline import SchedulingContext, SelectCandidateNodesPlugin
-from scheduler.util import index_nodes_into
+from scheduler.util import GeoIndex, SlantRangeIndex, index_nodes_into
 from geopy import distance
 
+GEO_INDEX_RADIUS_TOLERANCE = 1.01
+'''
+The GeoIndex uses a spherical Earth model, whereas geopy's geodesic distance uses the WGS-84 ellipsoid.
+The two differ by less than 0.5%, so we query the index with a slightly larger radius and check the hits with geopy.
+'''
+
+class VicinitySelectionMode(Enum):
+    '''Determines which nodes within the radius of a tier are selected by the SelectNodesInVicinityPlugin.'''
+
+    FIRST_IN_LIST = 'first-in-list'
+    '''Selects the first nodes within the radius in the order of the AvailableNodes lists.'''
+
+    NEAREST = 'nearest'
+    '''Selects the nodes within the radius that are closest to the desired location.'''
+
+
+class VicinityDistance(Enum):
+    '''Determines how the SelectNodesInVicinityPlugin measures the distance between the desired location and a node.'''
+
+    SURFACE = 'surface'
+    '''The geodesic distance on the surface of the WGS-84 ellipsoid. Altitudes are ignored.'''
+
+    SLANT_RANGE = 'slant-range'
+    '''The 3D straight-line distance between the ECEF positions, including the altitudes of satellites.'''
+
+
 class SelectNodesInVicinityPlugin(SelectCandidateNodesPlugin):
     '''
     Selects nodes in the vicinity of the first predecessor node.
 
+    By default, the first nodes within the radius of each tier are selected in list order.
+    In `VicinitySelectionMode.NEAREST` the closest nodes of each tier are selected instead.
+    The distance is measured on the Earth's surface by default or as 3D slant range in `VicinityDistance.SLANT_RANGE`.
+
     IMPORTANT: If the task to be scheduled is the first task of a workflow, random nodes are picked, because there is no predecessor,
     because at the moment our model does not allow a task to specify a desired location.
     '''
@@ -21,6 +53,8 @@ class SelectNodesInVicinityPlugin(SelectCandidateNodesPlugin):
         ground_nodes_count: int,
         edge_nodes_count: int,
         space_nodes_count: int,
+        selection_mode: VicinitySelectionMode = VicinitySelectionMode.FIRST_IN_LIST,
+        distance_mode: VicinityDistance = VicinityDistance.SURFACE,
     ):
         self.__radius_ground_km = radius_ground_km
         self.__radius_edge_km = radius_edge_km
@@ -28,7 +62,11 @@ class SelectNodesInVicinityPlugin(SelectCandidateNodesPlugin):
         self.__ground_nodes_count = ground_nodes_count
         self.__edge_nodes_count = edge_nodes_count
         self.__space_nodes_count = space_nodes_count
+        self.__selection_mode = selection_mode
+        self.__distance_mode = distance_mode
         self.__random = Random(radius_ground_km)
+        self.__indices: dict[int, tuple[list[Node], int, GeoIndex | SlantRangeIndex]] = {}
+        '''Caches the spatial index of each candidates list. The key is the id of the list, the list is kept to ensure that the id is not reused.'''
 
 
     def select_candidates(self, task: Task, all_nodes: AvailableNodes, ctx: SchedulingContext) -> dict[str, Node] | None:
@@ -90,13 +128,43 @@ class SelectNodesInVicinityPlugin(SelectCandidateNodesPlugin):
         raise SystemError(f'Unknown predecessor node type: {type(pred_node)}')
 
 
-    def __get_node_location_lat_long(self, node: Node, ctx: SchedulingContext) -> tuple[float, float]:
-        if isinstance(node, TerrestrialNode):
-            return (node.location.lat, node.location.long)
-        if isinstance(node, SatelliteNode):
-            satellite_loc = ctx.orchestrator.get_satellite_position(node)
-            return (satellite_loc[0], satellite_loc[1])
-        raise SystemError(f'Cannot get location of unknown node type: {type(node)}')
+    def __get_index(self, candidates: list[Node], ctx: SchedulingContext) -> GeoIndex | SlantRangeIndex:
+        '''
+        Gets the spatial index for the candidates list.
+        The index of terrestrial nodes is kept as long as the list does not change,
+        the index of satellites is additionally rebuilt whenever the orchestrator's time index changes.
+        '''
+        is_satellites = isinstance(candidates[0], SatelliteNode)
+        version = ctx.orchestrator.time_index if is_satellites else len(candidates)
+        cached = self.__indices.get(id(candidates))
+        if cached is not None and cached[0] is candidates and cached[1] == version and len(cached[2]) == len(candidates):
+            return cached[2]
+
+        if is_satellites:
+            positions = ctx.orchestrator.get_satellite_positions(cast(list[SatelliteNode], candidates))
+        else:
+            positions = self.__get_terrestrial_positions(cast(list[TerrestrialNode], candidates))
+
+        index: GeoIndex | SlantRangeIndex
+        if self.__distance_mode == VicinityDistance.SLANT_RANGE:
+            index = SlantRangeIndex(positions[:, 0], positions[:, 1], positions[:, 2])
+        else:
+            index = GeoIndex(positions[:, 0], positions[:, 1])
+        self.__indices[id(candidates)] = (candidates, version, index)
+        return index
+
+
+    def __get_terrestrial_positions(self, candidates: list[TerrestrialNode]) -> np.ndarray:
+        '''Returns the positions of the candidates as an array of shape (len(candidates), 3), where each row contains (lat, long, altitude_km).'''
+        located = NodeTable.locate(candidates)
+        if located is not None:
+            table, node_ids = located
+            return np.stack((table.lat[node_ids], table.long[node_ids], table.altitude_km[node_ids]), axis=-1)
+
+        positions = np.zeros((len(candidates), 3), dtype=np.float64)
+        for i, node in enumerate(candidates):
+            positions[i] = (node.location.lat, node.location.long, node.location.altitude_km)
+        return positions
 
 
     def __add_nodes[T: Node](
@@ -108,20 +176,83 @@ class SelectNodesInVicinityPlugin(SelectCandidateNodesPlugin):
         count: int,
         ctx: SchedulingContext,
     ) -> int:
+        if count <= 0 or len(candidates) == 0:
+            return 0
+
+        index = self.__get_index(cast(list[Node], candidates), ctx)
+        if isinstance(index, SlantRangeIndex):
+            return self.__add_nodes_by_slant_range(src_loc, index, candidates, selection, max_distance_km, count)
+
         src = (src_loc.lat, src_loc.long)
-        added = 0
+        if self.__selection_mode == VicinitySelectionMode.NEAREST:
+            return self.__add_nearest_nodes(src, index, candidates, selection, max_distance_km, count)
 
-        for candidate in candidates:
+        added = 0
+        # The index returns a superset of the nodes within max_distance_km in list order,
+        # so checking the hits with geopy yields the same nodes as a linear scan of the candidates list.
+        for i in index.query_radius(src_loc.lat, src_loc.long, max_distance_km * GEO_INDEX_RADIUS_TOLERANCE).tolist():
             if added == count:
                 break
-            candidate_loc = self.__get_node_location_lat_long(candidate, ctx)
-            dist = distance.geodesic(src, candidate_loc)
+            candidate = candidates[i]
+            dist = distance.geodesic(src, (index.lat[i], index.long[i]))
             if dist.km <= max_distance_km:
                 selection[candidate.name] = candidate
                 added += 1
         return added
 
 
+    def __add_nodes_by_slant_range[T: Node](
+        self,
+        src_loc: Location,
+        index: SlantRangeIndex,
+        candidates: list[T],
+        selection: dict[str, Node],
+        max_distance_km: float,
+        count: int,
+    ) -> int:
+        # The slant range distances computed by the index are exact, so no further checks are needed.
+        if self.__selection_mode == VicinitySelectionMode.NEAREST:
+            hits = index.query_nearest(src_loc.lat, src_loc.long, src_loc.altitude_km, count, max_distance_km)
+        else:
+            hits = index.query_radius(src_loc.lat, src_loc.long, src_loc.altitude_km, max_distance_km)[:count]
+        for i in hits.tolist():
+            candidate = candidates[i]
+            selection[candidate.name] = candidate
+        return len(hits)
+
+
+    def __add_nearest_nodes[T: Node](
+        self,
+        src: tuple[float, float],
+        index: GeoIndex,
+        candidates: list[T],
+        selection: dict[str, Node],
+        max_distance_km: float,
+        count: int,
+    ) -> int:
+        # We only compute the geodesic distance of the nearest neighbors returned by the index.
+        # If some of them turn out to be outside of max_distance_km, we query more neighbors.
+        query_count = count
+        while True:
+            hits = index.query_nearest(src[0], src[1], query_count, max_distance_km * GEO_INDEX_RADIUS_TOLERANCE)
+            dists = np.fromiter(
+                (distance.geodesic(src, (index.lat[i], index.long[i])).km for i in hits.tolist()),
+                dtype=np.float64,
+                count=len(hits),
+            )
+            in_range = dists <= max_distance_km
+            if np.count_nonzero(in_range) >= count or len(hits) < query_count:
+                break
+            query_count *= 2
+
+        hits = hits[in_range]
+        nearest = hits[np.argsort(dists[in_range], kind='stable')[:count]]
+        for i in nearest.tolist():
+            candidate = candidates[i]
+            selection[candidate.name] = candidate
+        return len(nearest)
+
+
     def __pick_random_nodes(self, all_nodes: AvailableNodes) -> dict[str, Node]:
         selection: dict[str, Node] = {}
         added = self.__add_random_nodes(all_nodes.ground_stations, selection, self.__ground_nodes_count)
@@ -1,8 +1,11 @@
-from typing import Any
+import math
+from typing import Any, Sequence
 from dataclasses import dataclass
-from scheduler.model import AvailableNodes, AvailableNodesIndexed, Node, EligibleNode, SatelliteNode, Task, Workflow
+from itertools import compress
+import numpy as np
+from scheduler.model import AvailableNodes, AvailableNodesIndexed, Node, EligibleNode, RankedNodes, SatelliteNode, Task, Workflow
 from scheduler.orchestrator import OrchestratorClient
-from scheduler.pipeline import CommitPlugin, FilterPlugin, SchedulingContext, ScorePlugin, SelectCandidateNodesPlugin
+from scheduler.pipeline import CommitPlugin, FilterPlugin, FilterResultsCache, SchedulingContext, ScorePlugin, SelectCandidateNodesPlugin
 from scheduler.util import Timer, index_nodes
 
 @dataclass
@@ -21,6 +24,8 @@ class SchedulingResult:
     avg_data_latency: float | None = None
     deg_C_over_recommended: float | None = None
     deg_C_over_max: float | None = None
+    budget_exceeded: bool = False
+    evaluated_nodes: int | None = None
 
     def to_dict(self) -> dict[str, Any]:
         return self.__dict__
@@ -34,10 +39,57 @@ class SchedulerPluginsConfig:
     commit_plugin: CommitPlugin
 
 
+MIN_FILTER_CHUNK_SIZE = 128
+'''The minimum number of nodes that are filtered at once when the number of nodes to score is limited or there is a time budget.'''
+
+
 @dataclass
 class SchedulerConfig(SchedulerPluginsConfig):
     orchestrator_client: OrchestratorClient
 
+    nodes_to_score: int | None = None
+    '''
+    If set, filtering stops once this many eligible nodes have been found and only these nodes are scored.
+    Filtering starts at a rotating offset in the list of candidate nodes, so that all nodes get a chance to be scored.
+    By default, all candidate nodes are filtered and scored.
+    '''
+
+    percentage_of_nodes_to_score: float | None = None
+    '''
+    Same as nodes_to_score, but the limit is specified as a percentage (0, 100] of the total number of nodes.
+    Only one of nodes_to_score and percentage_of_nodes_to_score may be set.
+    '''
+
+    time_budget_msec: float | None = None
+    '''
+    The default time budget of a scheduling cycle, which can be overridden per call of `Scheduler.schedule()`.
+    Once the budget is exceeded, filtering and scoring stop early and the best node found so far is committed.
+    By default, there is no time budget.
+    '''
+
+    cache_filter_results: bool = True
+    '''
+    If true, the results of cacheable filter plugins (see `FilterPlugin.cacheable`) are cached across tasks with the same equivalence key
+    and only recomputed for nodes that have been modified since.
+    '''
+
+
+@dataclass
+class _CycleBudget:
+    '''Tracks the time budget and the progress of a single scheduling cycle.'''
+
+    timer: Timer
+    budget_msec: float | None
+    evaluated_nodes: int = 0
+    '''The number of nodes that have been run through the filter plugins.'''
+
+    exceeded: bool = False
+
+    def check_exceeded(self) -> bool:
+        if not self.exceeded and self.budget_msec is not None and self.timer.elapsed_ms() >= self.budget_msec:
+            self.exceeded = True
+        return self.exceeded
+
 
 @dataclass
 class _TaskLatencies:
@@ -61,6 +113,10 @@ class Scheduler:
         self.__score_plugins = config.score_plugins
         self.__commit_plugin = config.commit_plugin
         self.__orchestrator = config.orchestrator_client
+        self.__time_budget_msec = config.time_budget_msec
+        self.__filter_cache = FilterResultsCache() if config.cache_filter_results else None
+        self.__next_start_index = 0
+        '''The index in the list of candidate nodes, at which the next sampled filtering run starts (see `nodes_to_score`).'''
 
         self.__avail_nodes = nodes
         self.__avail_nodes_indexed = AvailableNodesIndexed(
@@ -70,35 +126,49 @@ class Scheduler:
             satellites=index_nodes(nodes.satellites),
         )
         self.__total_nodes = len(nodes.satellites) + len(nodes.edge_nodes) + len(nodes.ground_stations) + len(nodes.cloud_nodes)
+        self.__nodes_to_score = self.__compute_nodes_to_score(config)
 
 
-    def schedule(self, task: Task, workflow: Workflow) -> SchedulingResult:
+    def schedule(self, task: Task, workflow: Workflow, time_budget_msec: float | None = None) -> SchedulingResult:
         '''
         Schedules the specified task of the workflow on the most suitable node.
+
+        If a time budget is specified (or configured in the SchedulerConfig), filtering and scoring stop early once it is exceeded
+        and the best node found so far is committed. At least one chunk of nodes is always filtered, so the budget may be overrun
+        by the duration of filtering one chunk and of running one score plugin.
         '''
         timer = Timer()
         timer.start()
         ctx = SchedulingContext(workflow=workflow, orchestrator=self.__orchestrator)
+        budget = _CycleBudget(timer, time_budget_msec if time_budget_msec is not None else self.__time_budget_msec)
 
         def scheduling_failure(reason: str) -> SchedulingResult:
             timer.stop()
             workflow.scheduled_tasks[task] = None
-            return SchedulingResult(total_nodes=self.__total_nodes, success=False, task=task.name, scheduling_duration_msec=timer.duration_ms(), failure_reason=reason)
+            return SchedulingResult(
+                total_nodes=self.__total_nodes,
+                success=False,
+                task=task.name,
+                scheduling_duration_msec=timer.duration_ms(),
+                failure_reason=reason,
+                budget_exceeded=budget.exceeded,
+                evaluated_nodes=budget.evaluated_nodes,
+            )
 
         candidate_nodes = self.__select_candidate_nodes_plugin.select_candidates(task, self.__avail_nodes, ctx)
         if candidate_nodes is not None:
             if len(candidate_nodes) == 0:
                 return scheduling_failure('No candidate nodes')
-            eligible_nodes = self.__filter_nodes(task, ctx, candidate_nodes, [])
+            eligible_nodes = self.__filter_nodes(task, ctx, list(candidate_nodes.values()), budget)
         else:
-            eligible_nodes = self.__filter_default_nodes(task, ctx)
+            eligible_nodes = self.__filter_default_nodes(task, ctx, budget)
 
         if len(eligible_nodes) == 0:
             return scheduling_failure('Filtering returned no eligible nodes')
 
-        self.__score_nodes(task, ctx, eligible_nodes)
+        scored_nodes = self.__score_nodes(task, ctx, eligible_nodes, budget)
 
-        target_node = self.__commit_task(task, eligible_nodes, workflow, ctx)
+        target_node = self.__commit_task(task, scored_nodes, workflow, ctx)
         if target_node is None:
             return scheduling_failure(f'Could not commit task {task.name} due to scheduling conflicts.')
         timer.stop()
@@ -120,6 +190,8 @@ class Scheduler:
             avg_data_latency_slo=latencies.avg_data_latency_slo,
             deg_C_over_recommended=temperatures.deg_C_over_recommended,
             deg_C_over_max=temperatures.deg_C_over_max,
+            budget_exceeded=budget.exceeded,
+            evaluated_nodes=budget.evaluated_nodes,
         )
 
 
@@ -144,52 +216,105 @@ class Scheduler:
         )
 
 
-    def __filter_default_nodes[T: Node](self, task: Task, ctx: SchedulingContext) -> list[EligibleNode]:
-        eligible_nodes: list[EligibleNode] = []
-        self.__filter_nodes(task, ctx, self.__avail_nodes_indexed.cloud_nodes, eligible_nodes)
-        self.__filter_nodes(task, ctx, self.__avail_nodes_indexed.ground_stations, eligible_nodes)
-        self.__filter_nodes(task, ctx, self.__avail_nodes_indexed.edge_nodes, eligible_nodes)
-        self.__filter_nodes(task, ctx, self.__avail_nodes_indexed.satellites, eligible_nodes)
-        return eligible_nodes
+    def __filter_default_nodes(self, task: Task, ctx: SchedulingContext, budget: _CycleBudget) -> list[Node]:
+        nodes: list[Node] = []
+        nodes.extend(self.__avail_nodes_indexed.cloud_nodes.values())
+        nodes.extend(self.__avail_nodes_indexed.ground_stations.values())
+        nodes.extend(self.__avail_nodes_indexed.edge_nodes.values())
+        nodes.extend(self.__avail_nodes_indexed.satellites.values())
+        return self.__filter_nodes(task, ctx, nodes, budget)
 
 
-    def __filter_nodes[T: Node](self, task: Task, ctx: SchedulingContext, nodes: dict[str, T], eligible_nodes: list[EligibleNode]) -> list[EligibleNode]:
-        for node in nodes.values():
-            eligible = True
-            for filter in self.__filter_plugins:
-                if not filter.filter(node, task, ctx):
-                    eligible = False
-                    break
+    def __filter_nodes(self, task: Task, ctx: SchedulingContext, nodes: list[Node], budget: _CycleBudget) -> list[Node]:
+        '''
+        Runs the filter plugins on the nodes and returns the eligible ones.
+        Each filter plugin only sees the nodes that have passed all previous filter plugins.
+        If the number of nodes to score is limited, filtering stops once enough eligible nodes have been found.
+        If there is a time budget, filtering stops once the budget is exceeded.
+        '''
+        for filter in self.__filter_plugins:
+            filter.pre_filter(nodes, task, ctx)
 
-            if eligible:
-                eligible_nodes.append(EligibleNode(node, 0))
+        limit = self.__nodes_to_score if self.__nodes_to_score is not None else len(nodes)
+        if limit < len(nodes) or (budget.budget_msec is not None and len(nodes) > MIN_FILTER_CHUNK_SIZE):
+            return self.__filter_nodes_limited(task, ctx, nodes, limit, budget)
 
-        return eligible_nodes
+        budget.evaluated_nodes += len(nodes)
+        return self.__run_filter_plugins(task, ctx, nodes)
 
 
-    def __score_nodes(self, task: Task, ctx: SchedulingContext, eligible_nodes: list[EligibleNode]):
+    def __filter_nodes_limited(self, task: Task, ctx: SchedulingContext, nodes: list[Node], limit: int, budget: _CycleBudget) -> list[Node]:
+        '''
+        Filters chunks of nodes until at least `limit` eligible nodes have been found or the time budget is exceeded
+        and returns the first `limit` eligible nodes.
+        Only if the nodes are sampled (`limit` < number of nodes), filtering starts at a rotating offset, so that all nodes get a chance over time.
+        Otherwise, the nodes are filtered in their original order, so that a cycle that stays within its budget yields the same result as without a budget.
+        '''
+        sampling = limit < len(nodes)
+        start = self.__next_start_index % len(nodes) if sampling else 0
+        rotated = nodes[start:] + nodes[:start]
+        # Without a limit, we are only bounded by the time budget, so we use small chunks to check it frequently.
+        chunk_size = max(limit, MIN_FILTER_CHUNK_SIZE) if sampling else MIN_FILTER_CHUNK_SIZE
+
+        eligible_nodes: list[Node] = []
+        processed = 0
+        while processed < len(rotated) and len(eligible_nodes) < limit:
+            chunk = rotated[processed:processed + chunk_size]
+            eligible_nodes.extend(self.__run_filter_plugins(task, ctx, chunk))
+            processed += len(chunk)
+            if budget.check_exceeded():
+                break
+
+        budget.evaluated_nodes += processed
+
+        if sampling:
+            self.__next_start_index = (start + processed) % len(nodes)
+        return eligible_nodes[:limit]
+
+
+    def __run_filter_plugins(self, task: Task, ctx: SchedulingContext, nodes: list[Node]) -> list[Node]:
+        for filter in self.__filter_plugins:
+            if len(nodes) == 0:
+                break
+            if self.__filter_cache is not None and filter.cacheable:
+                mask = self.__filter_cache.filter_batch(filter, nodes, task, ctx)
+            else:
+                mask = filter.filter_batch(nodes, task, ctx)
+            nodes = list(compress(nodes, mask))
+        return nodes
+
+
+    def __score_nodes(self, task: Task, ctx: SchedulingContext, eligible_nodes: list[Node], budget: _CycleBudget) -> RankedNodes:
+        '''
+        Scores the eligible nodes and returns them sorted from highest to lowest score.
+        Only the number of nodes requested by the commit plugin is ranked upfront.
+        If the time budget is exceeded, the remaining score plugins are skipped (the first one always runs) and the scores are averaged over the plugins that have run.
+        '''
         for score_plugin in self.__score_plugins:
-            self.__run_score_plugin(score_plugin, task, ctx, eligible_nodes)
+            score_plugin.pre_score(eligible_nodes, task, ctx)
 
-        for node in eligible_nodes:
-            node.score = int(node.score / len(self.__score_plugins))
+        scores = np.zeros(len(eligible_nodes), dtype=np.int64)
+        plugins_run = 0
+        for score_plugin in self.__score_plugins:
+            if plugins_run > 0 and budget.check_exceeded():
+                break
+            scores += self.__run_score_plugin(score_plugin, task, ctx, eligible_nodes)
+            plugins_run += 1
 
-        eligible_nodes.sort(reverse=True, key=lambda n: n.score)
+        if plugins_run > 0:
+            # Truncate the averages like int() does.
+            scores = (scores / plugins_run).astype(np.int64)
 
+        return RankedNodes(eligible_nodes, scores, self.__commit_plugin.ranked_nodes_count)
 
-    def __run_score_plugin(self, score_plugin: ScorePlugin, task: Task, ctx: SchedulingContext, eligible_nodes: list[EligibleNode]):
-        '''Runs the score plugin and adds its score to each node.'''
-        node_scores: list[EligibleNode] = []
-        for node in eligible_nodes:
-            score = score_plugin.score(node.node, task, ctx)
-            node_scores.append(EligibleNode(node.node, score))
 
-        score_plugin.normalize_scores(task, node_scores, ctx)
-        for i, node in enumerate(eligible_nodes):
-            node.score += node_scores[i].score
+    def __run_score_plugin(self, score_plugin: ScorePlugin, task: Task, ctx: SchedulingContext, eligible_nodes: list[Node]) -> np.ndarray:
+        '''Runs the score plugin and returns its normalized score for each node.'''
+        scores = score_plugin.score_batch(eligible_nodes, task, ctx)
+        return score_plugin.normalize_scores_batch(task, eligible_nodes, scores, ctx)
 
 
-    def __commit_task(self, task: Task, scored_nodes: list[EligibleNode], workflow: Workflow | None, ctx: SchedulingContext) -> EligibleNode | None:
+    def __commit_task(self, task: Task, scored_nodes: Sequence[EligibleNode], workflow: Workflow | None, ctx: SchedulingContext) -> EligibleNode | None:
         committed_node = self.__commit_plugin.commit(task, scored_nodes, ctx)
         if committed_node is None:
             return None
@@ -199,6 +324,20 @@ class Scheduler:
         return committed_node
 
 
+    def __compute_nodes_to_score(self, config: SchedulerConfig) -> int | None:
+        if config.nodes_to_score is not None and config.percentage_of_nodes_to_score is not None:
+            raise ValueError('Only one of nodes_to_score and percentage_of_nodes_to_score may be set.')
+        if config.nodes_to_score is not None:
+            if config.nodes_to_score <= 0:
+                raise ValueError('nodes_to_score must be greater than 0.')
+            return config.nodes_to_score
+        if config.percentage_of_nodes_to_score is not None:
+            if config.percentage_of_nodes_to_score <= 0 or config.percentage_of_nodes_to_score > 100:
+                raise ValueError('percentage_of_nodes_to_score must be in the range (0, 100].')
+            return max(1, math.ceil(self.__total_nodes * config.percentage_of_nodes_to_score / 100))
+        return None
+
+
     def __compute_latencies(self, task: Task, target_node: Node, ctx: SchedulingContext) -> _TaskLatencies:
         avg_preds_latency: float | None = 0.0
         avg_preds_latency_slo: float | None = 0.0
@@ -1,4 +1,5 @@
 from .collections import *
+from .geo_index import *
 from .heat_estimator import *
 from .node import *
 from .timer import *
@@ -0,0 +1,139 @@
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+'''The mean radius of the Earth in km.'''
+
+WGS84_SEMI_MAJOR_AXIS_KM = 6378.137
+'''The equatorial radius of the WGS-84 ellipsoid in km.'''
+
+WGS84_ECCENTRICITY_SQ = 6.69437999014e-3
+'''The squared first eccentricity of the WGS-84 ellipsoid.'''
+
+
+def lat_long_to_unit_vectors(lat: np.ndarray, long: np.ndarray) -> np.ndarray:
+    '''Converts arrays of latitudes and longitudes (in degrees) to an array of shape (n, 3) with unit vectors pointing to these locations.'''
+    lat_rad = np.radians(lat)
+    long_rad = np.radians(long)
+    cos_lat = np.cos(lat_rad)
+    return np.stack((cos_lat * np.cos(long_rad), cos_lat * np.sin(long_rad), np.sin(lat_rad)), axis=-1)
+
+
+def lat_long_alt_to_ecef(lat: np.ndarray, long: np.ndarray, altitude_km: np.ndarray) -> np.ndarray:
+    '''
+    Converts arrays of latitudes, longitudes (in degrees), and altitudes (in km above the WGS-84 ellipsoid)
+    to an array of shape (n, 3) with Earth-centered, Earth-fixed (ECEF) coordinates in km.
+    '''
+    lat_rad = np.radians(lat)
+    long_rad = np.radians(long)
+    sin_lat = np.sin(lat_rad)
+    cos_lat = np.cos(lat_rad)
+    prime_vertical_radius = WGS84_SEMI_MAJOR_AXIS_KM / np.sqrt(1.0 - WGS84_ECCENTRICITY_SQ * sin_lat * sin_lat)
+    return np.stack(
+        (
+            (prime_vertical_radius + altitude_km) * cos_lat * np.cos(long_rad),
+            (prime_vertical_radius + altitude_km) * cos_lat * np.sin(long_rad),
+            (prime_vertical_radius * (1.0 - WGS84_ECCENTRICITY_SQ) + altitude_km) * sin_lat,
+        ),
+        axis=-1,
+    )
+
+
+class GeoIndex:
+    '''
+    Spatial index over locations on the Earth's surface, which answers radius queries on the great-circle distance.
+
+    The locations are stored as unit vectors in a k-d tree, because the great-circle distance on a sphere
+    is a monotonic function of the chord length between the unit vectors.
+    '''
+
+    def __init__(self, lat: np.ndarray, long: np.ndarray):
+        self.lat = lat
+        '''The latitudes of the indexed locations.'''
+
+        self.long = long
+        '''The longitudes of the indexed locations.'''
+
+        self.__tree = cKDTree(lat_long_to_unit_vectors(lat, long))
+
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+
+    def query_radius(self, lat: float, long: float, radius_km: float) -> np.ndarray:
+        '''
+        Returns the indices of all locations whose great-circle distance from (lat, long) is at most radius_km.
+        The indices are sorted in ascending order.
+        '''
+        center = lat_long_to_unit_vectors(np.array(lat), np.array(long))
+        indices = self.__tree.query_ball_point(center, self.__to_chord(radius_km), return_sorted=True)
+        return np.asarray(indices, dtype=np.intp)
+
+
+    def query_nearest(self, lat: float, long: float, k: int, radius_km: float) -> np.ndarray:
+        '''
+        Returns the indices of the (at most) k locations closest to (lat, long) whose great-circle distance is at most radius_km.
+        The indices are sorted by ascending distance.
+        '''
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        center = lat_long_to_unit_vectors(np.array(lat), np.array(long))
+        # Passing k as a list ensures that an array is returned even if k == 1.
+        # The upper bound of cKDTree.query() is exclusive, so we increase it by a tiny amount.
+        upper_bound = np.nextafter(self.__to_chord(radius_km), np.inf)
+        _, indices = self.__tree.query(center, k=list(range(1, k + 1)), distance_upper_bound=upper_bound)
+        indices = np.asarray(indices, dtype=np.intp)
+
+        # Missing neighbors are indicated by an index of len(self).
+        return indices[indices < len(self)]
+
+
+    def __to_chord(self, radius_km: float) -> float:
+        angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        return 2.0 * math.sin(angle / 2.0)
+
+
+class SlantRangeIndex:
+    '''
+    Spatial index over locations on or above the Earth's surface, which answers radius queries on the 3D straight-line (slant range) distance.
+
+    The locations are converted to ECEF coordinates once and stored in a k-d tree, so the distances computed by the tree are exact.
+    '''
+
+    def __init__(self, lat: np.ndarray, long: np.ndarray, altitude_km: np.ndarray):
+        self.ecef = lat_long_alt_to_ecef(lat, long, altitude_km)
+        '''The ECEF coordinates in km of the indexed locations with shape (n, 3).'''
+
+        self.__tree = cKDTree(self.ecef)
+
+
+    def __len__(self) -> int:
+        return len(self.ecef)
+
+
+    def query_radius(self, lat: float, long: float, altitude_km: float, radius_km: float) -> np.ndarray:
+        '''
+        Returns the indices of all locations whose slant range from (lat, long, altitude_km) is at most radius_km.
+        The indices are sorted in ascending order.
+        '''
+        center = lat_long_alt_to_ecef(np.array(lat), np.array(long), np.array(altitude_km))
+        indices = self.__tree.query_ball_point(center, radius_km, return_sorted=True)
+        return np.asarray(indices, dtype=np.intp)
+
+
+    def query_nearest(self, lat: float, long: float, altitude_km: float, k: int, radius_km: float) -> np.ndarray:
+        '''
+        Returns the indices of the (at most) k locations closest to (lat, long, altitude_km) whose slant range is at most radius_km.
+        The indices are sorted by ascending distance.
+        '''
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        center = lat_long_alt_to_ecef(np.array(lat), np.array(long), np.array(altitude_km))
+        upper_bound = np.nextafter(radius_km, np.inf)
+        _, indices = self.__tree.query(center, k=list(range(1, k + 1)), distance_upper_bound=upper_bound)
+        indices = np.asarray(indices, dtype=np.intp)
+        return indices[indices < len(self)]
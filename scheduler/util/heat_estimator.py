@@ -1,4 +1,5 @@
-from scheduler.model import ResourceType, SatelliteNode, Task
+import numpy as np
+from scheduler.model import CPU_ARCHITECTURES, NodeTable, ResourceType, SatelliteNode, Task
 
 class HeatEstimator:
     '''Utility for estimating the hardware temperature of a satellite during the processing of a task.'''
@@ -16,6 +17,30 @@ class HeatEstimator:
         return max_orbit_temp + temp_increase
 
 
+    def estimate_max_temps(self, table: NodeTable, node_ids: np.ndarray, task: Task) -> np.ndarray:
+        '''
+        Vectorized version of estimate_max_temp(), which returns an array with the estimated max temperature of each of
+        the specified satellites in the NodeTable.
+        '''
+        exp_runtime_msec_by_arch = np.array(
+            [ task.expected_exec_time_msec.get(arch, np.nan) for arch in CPU_ARCHITECTURES ],
+            dtype=np.float64,
+        )
+        exp_runtime_msec = exp_runtime_msec_by_arch[table.cpu_arch[node_ids]]
+
+        # Nodes without a runtime estimate keep their current temperature.
+        has_estimate = ~np.isnan(exp_runtime_msec)
+        exp_runtime_minutes = np.where(has_estimate, exp_runtime_msec, 0.0) / 1000 / 60
+
+        max_temp = table.max_temp_C[node_ids]
+        max_orbit_temp = np.trunc(table.mocked_max_orbit_base_temp_C[node_ids] * exp_runtime_minutes).astype(np.int64) % np.trunc(max_temp).astype(np.int64)
+        cpu_cores = task.req_resources.get(ResourceType.MILLI_CPU, 0) / 1000.0
+        cpu_minutes = exp_runtime_minutes * cpu_cores
+        exp_increase = table.temp_inc_per_cpu_minute_C[node_ids] * cpu_minutes
+        cooling = table.radiated_heat_per_minute_C[node_ids] * exp_runtime_minutes
+        return np.where(has_estimate, max_orbit_temp + (exp_increase - cooling), table.temperature_C[node_ids])
+
+
     def __estimate_max_orbit_temp(self, node: SatelliteNode, exp_runtime_minutes: float) -> float:
         return int(node.heat_status.mocked_max_orbit_base_temp_C * exp_runtime_minutes) % int(node.heat_status.max_temp_C)
 
@@ -16,4 +16,8 @@ class Timer:
     
     def duration_ms(self) -> int:
         duration = (self.stop_ns - self.start_ns) / 1000000
-        return int(duration)
\ No newline at end of file
+        return int(duration)
+
+    def elapsed_ms(self) -> float:
+        '''Returns the milliseconds since start() without stopping the timer.'''
+        return (perf_counter_ns() - self.start_ns) / 1000000